@@ -0,0 +1,56 @@
+"""Replay saved MonClub payloads through every installed JSON backend and compare decode times"""
+import argparse
+import statistics
+import sys
+import time
+
+from script import load_json_backend
+
+BACKENDS = ['orjson', 'ujson', 'stdlib']
+
+def available_backends():
+    """Return the (name, loads) pairs of the installed JSON backends"""
+    backends = []
+    for name in BACKENDS:
+        try:
+            backend_name, loads, _ = load_json_backend(name)
+        except ImportError:
+            continue
+        backends.append((backend_name, loads))
+    return backends
+
+def time_decode(loads, body, repeat):
+    """Decode body repeat times and return the durations in milliseconds"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        loads(body)
+        durations.append((time.perf_counter() - started) * 1000)
+    return durations
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare JSON backends on saved MonClub payloads')
+    parser.add_argument('payloads', nargs='+', metavar='PAYLOAD', help='File holding a raw MonClub JSON response')
+    parser.add_argument('--repeat', type=int, default=10, help='Decodes per payload and backend (default: 10)')
+    args = parser.parse_args(argv)
+
+    backends = available_backends()
+    print(f"{'payload':40} {'size':>10} {'backend':>8} {'best ms':>10} {'mean ms':>10}")
+    for path in args.payloads:
+        with open(path, 'rb') as payload_file:
+            body = payload_file.read()
+
+        # Every backend must decode the payload to the same data
+        reference = backends[-1][1](body)
+        for name, loads in backends:
+            if loads(body) != reference:
+                print(f"{path}: {name} decodes differently from {backends[-1][0]}", file=sys.stderr)
+                return 1
+
+        for name, loads in backends:
+            durations = time_decode(loads, body, args.repeat)
+            print(f"{path[-40:]:40} {len(body):>10} {name:>8} {min(durations):>10.2f} {statistics.mean(durations):>10.2f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,16 +1,422 @@
 from __future__ import print_function
 import time
 import os
+import io
+import csv
+import sys
+import json
+import argparse
+import fnmatch
+import contextlib
+import functools
+import cProfile
+import tracemalloc
+import logging
+import gzip
+import hashlib
+import sqlite3
+import queue
+import threading
 import requests
+import urllib3
 import brevo_python
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from brevo_python.rest import ApiException
-from pprint import pprint
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Structured logging
+logger = logging.getLogger('monclub_brevo_sync')
+
+def format_log_value(value):
+    """Format a single log field value, quoting it when it contains spaces, quotes or line breaks"""
+    text = str(value)
+    if not text or any(char in text for char in ' ="\n\r'):
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+class StructuredFormatter(logging.Formatter):
+    """Format log records as key=value pairs or JSON lines"""
+
+    def __init__(self, output_format='kv'):
+        super().__init__()
+        self.output_format = output_format
+
+    def format(self, record):
+        fields = {
+            'ts': datetime.fromtimestamp(record.created).strftime('%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname.lower(),
+            'event': record.getMessage()
+        }
+        # Fields without a value are left out to keep the lines short
+        fields.update((key, value) for key, value in getattr(record, 'fields', {}).items() if value is not None)
+        if self.output_format == 'json':
+            return json.dumps(fields, ensure_ascii=False, default=str)
+        return ' '.join(f"{key}={format_log_value(value)}" for key, value in fields.items())
+
+class BufferedStreamHandler(logging.Handler):
+    """Collect formatted log lines and write them to the stream in blocks"""
+
+    def __init__(self, stream, capacity=500):
+        super().__init__()
+        self.stream = stream
+        self.capacity = capacity
+        self.lines = []
+
+    def emit(self, record):
+        try:
+            self.lines.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        # Errors are written right away so they are never lost in the buffer
+        if len(self.lines) >= self.capacity or record.levelno >= logging.ERROR:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self.lines:
+                self.stream.write('\n'.join(self.lines) + '\n')
+                self.lines = []
+            self.stream.flush()
+        finally:
+            self.release()
+
+def setup_logging():
+    """Configure the structured logger from LOG_LEVEL, LOG_FORMAT and LOG_BUFFER_SIZE"""
+    level_name = os.getenv('LOG_LEVEL', 'INFO').upper()
+    output_format = os.getenv('LOG_FORMAT', 'kv').lower()
+    buffer_size = int(os.getenv('LOG_BUFFER_SIZE', '500'))
+
+    handler = BufferedStreamHandler(sys.stdout, capacity=buffer_size)
+    handler.setFormatter(StructuredFormatter(output_format))
+    logger.handlers = [handler]
+    logger.setLevel(getattr(logging, level_name, logging.INFO))
+    logger.propagate = False
+
+def log_event(level, event, **fields):
+    """Log a structured event with its fields (no-op when the level is disabled)"""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': fields})
+
+def flush_logs():
+    """Write any buffered log lines to the output stream"""
+    for handler in logger.handlers:
+        handler.flush()
+
+setup_logging()
+
+# Gzip MonClub request bodies (only if the MonClub server accepts Content-Encoding: gzip)
+MONCLUB_COMPRESS_REQUESTS = os.getenv('MONCLUB_COMPRESS_REQUESTS', 'false').lower() in ('true', '1', 'yes')
+
+# Number of contacts handed to the Brevo writers at a time (multiple of the 150-contact API batches)
+DIFF_CHUNK_SIZE = 1500
+
+# Profiling
+class PhaseProfiler:
+    """Capture cProfile statistics and tracemalloc allocation diffs for each run phase.
+
+    A phase can run many times (once per list for diff, upserts, adds and
+    removes); its cProfile data accumulates into a single .pstats file and
+    every run appends its top allocations to <phase>.allocations.txt.
+    tracemalloc is process-wide, so in pipelined mode the allocation diffs
+    also include what the other thread allocated meanwhile.
+    """
+
+    def __init__(self, run_dir, top_allocations=25):
+        os.makedirs(run_dir, exist_ok=True)
+        self.run_dir = run_dir
+        self.top_allocations = top_allocations
+        self.profiles = {}
+        self.allocation_reports = {}
+        self.lock = threading.Lock()
+        tracemalloc.start(25)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        with self.lock:
+            profile = self.profiles.setdefault(name, cProfile.Profile())
+        # Snapshots are taken outside the cProfile window so they don't show up in the stats
+        snapshot_before = tracemalloc.take_snapshot()
+        started = time.perf_counter()
+        try:
+            profile.enable()
+            profiling = True
+        except ValueError:
+            # Another profiler is already active (e.g. the same phase in the other pipeline thread)
+            profiling = False
+        try:
+            yield
+        finally:
+            if profiling:
+                profile.disable()
+            elapsed = time.perf_counter() - started
+            snapshot_after = tracemalloc.take_snapshot()
+            top_stats = snapshot_after.compare_to(snapshot_before, 'lineno')[:self.top_allocations]
+            report = [f"--- {name} run ({elapsed:.3f}s, {threading.current_thread().name})"]
+            report.extend(str(stat) for stat in top_stats)
+            with self.lock:
+                self.allocation_reports.setdefault(name, []).append('\n'.join(report))
+
+    def write(self):
+        """Write one .pstats file and one allocation report per phase into the run directory"""
+        with self.lock:
+            for name, profile in self.profiles.items():
+                try:
+                    profile.dump_stats(os.path.join(self.run_dir, f"{name}.pstats"))
+                except (TypeError, ValueError):
+                    # The phase never ran with cProfile enabled
+                    pass
+            for name, reports in self.allocation_reports.items():
+                with open(os.path.join(self.run_dir, f"{name}.allocations.txt"), 'w') as report_file:
+                    report_file.write('\n\n'.join(reports) + '\n')
+        tracemalloc.stop()
+        log_event(logging.INFO, 'profile_written', run_dir=self.run_dir, phases=','.join(sorted(self.profiles)))
+
+# Set by --profile; when None, profile_phase() returns a shared no-op context manager
+profiler = None
+NO_PROFILING = contextlib.nullcontext()
+
+def profile_phase(name):
+    """Context manager profiling a run phase when --profile is enabled"""
+    if profiler is None:
+        return NO_PROFILING
+    return profiler.phase(name)
+
+def parse_args(argv=None):
+    """Parse the command line options"""
+    parser = argparse.ArgumentParser(description='Synchronize MonClub lists to Brevo')
+    parser.add_argument(
+        '--profile', nargs='?', const='', default=None, metavar='RUN_DIR',
+        help='Profile each phase with cProfile and tracemalloc and write the reports to RUN_DIR '
+             '(default: profiles/<timestamp>)'
+    )
+    selection = parser.add_argument_group('list selection', 'Sync only some of the MonClub lists (sub-lists of a selected list are included)')
+    selection.add_argument(
+        '--list-id', action='append', default=[], metavar='ID',
+        help='MonClub list _id to sync (repeatable)'
+    )
+    selection.add_argument(
+        '--list-name', action='append', default=[], metavar='PATTERN',
+        help='Case-insensitive shell pattern matched against the list name, e.g. "Natation*" or "Natation / Groupe ?" (repeatable)'
+    )
+    selection.add_argument(
+        '--min-members', type=int, default=None, metavar='N',
+        help='Only sync lists with at least N unique emails'
+    )
+    selection.add_argument(
+        '--max-members', type=int, default=None, metavar='N',
+        help='Only sync lists with at most N unique emails'
+    )
+    selection.add_argument(
+        '--changed-since', type=parse_timestamp, default=None, metavar='TIMESTAMP',
+        help='Only sync lists with a member updated in MonClub at or after TIMESTAMP '
+             '(ISO 8601, local time unless an offset is given)'
+    )
+    selection.add_argument(
+        '--changed-only', action='store_true',
+        help='Only sync lists whose members differ from the last verified sync (uses the sync state fingerprints)'
+    )
+    return parser.parse_args(argv)
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 timestamp into an aware datetime (naive values are taken as local time)"""
+    try:
+        timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid timestamp: {value!r}")
+    return timestamp.astimezone()
+
+# Timeouts and circuit breakers
+def get_timeout(prefix, default_connect, default_read):
+    """Read a (connect, read) timeout pair in seconds from <prefix>_CONNECT_TIMEOUT and <prefix>_READ_TIMEOUT"""
+    return (
+        float(os.getenv(f'{prefix}_CONNECT_TIMEOUT', default_connect)),
+        float(os.getenv(f'{prefix}_READ_TIMEOUT', default_read))
+    )
+
+MONCLUB_TIMEOUTS = {
+    'monclub_authenticate': get_timeout('MONCLUB_AUTH', 5, 30),
+    'monclub_lists': get_timeout('MONCLUB_LISTS', 5, 60),
+    'monclub_members': get_timeout('MONCLUB_MEMBERS', 5, 120)
+}
+BREVO_TIMEOUT = get_timeout('BREVO', 5, 60)
+NOTIFICATION_TIMEOUT = get_timeout('NOTIFICATION', 5, 30)
+
+class CircuitOpenError(Exception):
+    """Raised when an upstream's circuit breaker is open and the run must stop"""
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+        super().__init__(
+            f"{breaker.name} circuit breaker open after {breaker.failures} consecutive failures "
+            f"(last error: {breaker.last_error})"
+        )
+
+class CircuitBreaker:
+    """Open after failure_threshold consecutive upstream failures and reject every later call"""
+
+    def __init__(self, name, is_failure, failure_threshold=None):
+        if failure_threshold is None:
+            failure_threshold = int(os.getenv('CIRCUIT_BREAKER_THRESHOLD', '5'))
+        self.name = name
+        self.is_failure = is_failure
+        self.failure_threshold = failure_threshold
+        self.failures = 0
+        self.last_error = None
+        self.is_open = False
+        self.lock = threading.Lock()
+
+    def call(self, func, *args, **kwargs):
+        if self.is_open:
+            raise CircuitOpenError(self)
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if self.is_failure(e):
+                self.record_failure(e)
+            else:
+                # An error response still proves the upstream is alive
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+
+    def record_failure(self, error):
+        with self.lock:
+            self.failures += 1
+            self.last_error = error
+            if self.failures >= self.failure_threshold and not self.is_open:
+                self.is_open = True
+                log_event(logging.ERROR, 'circuit_breaker_open', upstream=self.name, failures=self.failures, error=error)
+
+def is_monclub_failure(error):
+    """Connection problems, timeouts and 5xx responses count against the MonClub breaker"""
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code >= 500
+    return isinstance(error, requests.exceptions.RequestException)
+
+def is_brevo_failure(error):
+    """Connection problems, timeouts (status 0 or raw urllib3 errors) and 5xx responses count against the Brevo breaker"""
+    if isinstance(error, ApiException):
+        return not error.status or error.status >= 500
+    return True
+
+monclub_breaker = CircuitBreaker('MonClub', is_monclub_failure)
+brevo_breaker = CircuitBreaker('Brevo', is_brevo_failure)
+
+# JSON codec: use the fastest installed parser, falling back to the standard library
+def load_json_backend(name):
+    """Return (name, loads, dumps) for a JSON backend; dumps returns bytes"""
+    if name == 'orjson':
+        import orjson
+        return 'orjson', orjson.loads, orjson.dumps
+    if name == 'ujson':
+        import ujson
+        return 'ujson', ujson.loads, lambda obj: ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+    return 'stdlib', json.loads, lambda obj: json.dumps(obj).encode('utf-8')
+
+def select_json_backend():
+    """Pick the JSON backend from JSON_BACKEND (auto, orjson, ujson or stdlib)"""
+    preferred = os.getenv('JSON_BACKEND', 'auto').lower()
+    candidates = ['orjson', 'ujson', 'stdlib'] if preferred == 'auto' else [preferred, 'stdlib']
+    for name in candidates:
+        try:
+            return load_json_backend(name)
+        except ImportError:
+            continue
+    return load_json_backend('stdlib')
+
+JSON_BACKEND, json_loads, json_dumps = select_json_backend()
+
+# Ask for compressed responses (brotli only when urllib3 can decode it)
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+# Per-endpoint transfer and decode statistics, reported at the end of the run
+codec_stats = {}
+codec_stats_lock = threading.Lock()
+
+def record_codec_stats(endpoint, wire_bytes, body_bytes, decode_times):
+    """Accumulate bytes on the wire, decoded body size and decode time per backend for an endpoint"""
+    with codec_stats_lock:
+        stats = codec_stats.setdefault(endpoint, {'calls': 0, 'wire_bytes': 0, 'body_bytes': 0, 'decode_seconds': {}})
+        stats['calls'] += 1
+        stats['wire_bytes'] += wire_bytes
+        stats['body_bytes'] += body_bytes
+        for backend, seconds in decode_times.items():
+            stats['decode_seconds'][backend] = stats['decode_seconds'].get(backend, 0.0) + seconds
+
+def decode_json_response(response, endpoint):
+    """Decode a JSON response with the selected backend and record its transfer statistics"""
+    body = response.content
+    # urllib3 counts the bytes read from the socket, i.e. before decompression
+    wire_bytes = response.raw.tell() if hasattr(response.raw, 'tell') else 0
+    if not wire_bytes:
+        wire_bytes = int(response.headers.get('Content-Length') or len(body))
+    
+    started = time.perf_counter()
+    try:
+        data = json_loads(body)
+    except ValueError as e:
+        # orjson and ujson errors are not RequestExceptions, report them as MonClub API errors
+        raise requests.exceptions.InvalidJSONError(f"Invalid JSON from {endpoint}: {e}", response=response) from e
+    decode_times = {JSON_BACKEND: time.perf_counter() - started}
+    
+    record_codec_stats(endpoint, wire_bytes, len(body), decode_times)
+    return data
+
+def log_codec_stats():
+    """Log the per-endpoint transfer and decode statistics"""
+    with codec_stats_lock:
+        for endpoint, stats in sorted(codec_stats.items()):
+            fields = {f"decode_ms_{backend}": round(seconds * 1000, 1) for backend, seconds in stats['decode_seconds'].items()}
+            log_event(
+                logging.INFO, 'endpoint_stats',
+                endpoint=endpoint,
+                backend=JSON_BACKEND,
+                calls=stats['calls'],
+                wire_bytes=stats['wire_bytes'],
+                body_bytes=stats['body_bytes'],
+                **fields
+            )
+
+# MonClub HTTP session: keeps connections alive
+monclub_session = requests.Session()
+# requests already asks for gzip and deflate; only brotli needs to be added
+if 'br' in ACCEPT_ENCODING:
+    monclub_session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+
+def monclub_request(method, url, endpoint, payload=None, headers=None):
+    """Send a request to MonClub, encoding the JSON body with the selected backend"""
+    headers = dict(headers or {})
+    headers['Content-Type'] = 'application/json'
+    data = None
+    if payload is not None:
+        data = json_dumps(payload)
+        # Request bodies are only compressed when the server is known to accept it
+        if MONCLUB_COMPRESS_REQUESTS and len(data) >= 1024:
+            data = gzip.compress(data)
+            headers['Content-Encoding'] = 'gzip'
+    def send():
+        response = monclub_session.request(method, url, data=data, headers=headers, timeout=MONCLUB_TIMEOUTS.get(endpoint))
+        response.raise_for_status()
+        return response
+    response = monclub_breaker.call(send)
+    return decode_json_response(response, endpoint)
+
 # MonClub API configuration
 def get_monclub_base_url():
     """Get MonClub base URL from environment variable"""
@@ -32,9 +438,7 @@ def authenticate_monclub():
         "customId": os.getenv('MONCLUB_CUSTOM_ID')
     }
     
-    response = requests.post(auth_url, json=payload)
-    response.raise_for_status()
-    data = response.json()
+    data = monclub_request('POST', auth_url, 'monclub_authenticate', payload=payload)
     return data.get("token")
 
 # Get lists from MonClub API
@@ -45,13 +449,10 @@ def get_monclub_lists(token):
     monclub_lists_url = f"{base_url}/api/clubs/admin/custom/{custom_id}"
     
     headers = {
-        "Authorization": token,
-        "Content-Type": "application/json"
+        "Authorization": token
     }
     
-    response = requests.get(monclub_lists_url, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    return monclub_request('GET', monclub_lists_url, 'monclub_lists', headers=headers)
 
 # Get members from a specific list
 def get_monclub_list_members(token, list_id):
@@ -61,8 +462,7 @@ def get_monclub_list_members(token, list_id):
     members_url = f"{base_url}/api/customs/members"
     
     headers = {
-        "Authorization": token,
-        "Content-Type": "application/json"
+        "Authorization": token
     }
     
     payload = {
@@ -115,11 +515,212 @@ def get_monclub_list_members(token, list_id):
         "inactive": False
     }
     
-    response = requests.post(members_url, json=payload, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    return monclub_request('POST', members_url, 'monclub_members', payload=payload, headers=headers)
+
+# MonClub member extraction
+def extract_monclub_members(members_response):
+    """Extract email, firstName and lastName of members and their tutors from a MonClub members response"""
+    # Extract email, firstName, and lastName from each member
+    # Also extract emails from tutors
+    extracted_members = []
+    if isinstance(members_response, list):
+        for member in members_response:
+            if isinstance(member, dict):
+                # Extract member's own email
+                member_email = member.get("email", "").strip().lower()
+                if member_email:
+                    extracted_member = {
+                        "email": member_email,
+                        "firstName": member.get("firstName", ""),
+                        "lastName": member.get("lastName", "")
+                    }
+                    extracted_members.append(extracted_member)
+
+                # Extract tutor emails
+                tutors = member.get("tutors", [])
+                if isinstance(tutors, list):
+                    for tutor in tutors:
+                        if isinstance(tutor, dict):
+                            tutor_email = tutor.get("email", "").strip().lower()
+                            if tutor_email:
+                                # Parse fullName to get firstName and lastName
+                                full_name = tutor.get("fullName", "").strip()
+                                name_parts = full_name.split(maxsplit=1) if full_name else []
+                                tutor_first_name = name_parts[0] if len(name_parts) > 0 else ""
+                                tutor_last_name = name_parts[1] if len(name_parts) > 1 else ""
+
+                                extracted_tutor = {
+                                    "email": tutor_email,
+                                    "firstName": tutor_first_name,
+                                    "lastName": tutor_last_name
+                                }
+                                extracted_members.append(extracted_tutor)
+    return extracted_members
+
+def latest_member_update(members_response):
+    """Return the most recent updatedAt of the members of a MonClub members response, or None"""
+    latest = None
+    if isinstance(members_response, list):
+        for member in members_response:
+            if isinstance(member, dict) and member.get("updatedAt"):
+                try:
+                    updated_at = datetime.fromisoformat(member["updatedAt"].replace('Z', '+00:00'))
+                except ValueError:
+                    continue
+                if updated_at.tzinfo is None:
+                    updated_at = updated_at.replace(tzinfo=timezone.utc)
+                if latest is None or updated_at > latest:
+                    latest = updated_at
+    return latest
+
+def fetch_list_members(token, list_data):
+    """Fetch the members of a MonClub list and store them in list_data['members']"""
+    try:
+        with profile_phase('member_extraction'):
+            members_response = get_monclub_list_members(token, list_data['_id'])
+            # Store extracted members in the list_data dictionary
+            list_data['members'] = extract_monclub_members(members_response)
+            list_data['updated_at'] = latest_member_update(members_response)
+            del members_response
+        log_event(logging.INFO, 'monclub_members_fetched', list=list_data['name'], contacts=len(list_data['members']))
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        log_event(logging.ERROR, 'monclub_members_error', list=list_data['name'], error=e)
+        list_data['members'] = []
+        list_data['members_error'] = str(e)
+    return list_data
+
+def load_list_members(token, list_data):
+    """Fetch a leaf list's members, or derive a parent list's members as the union of its sub-lists.
+
+    Lists are processed children-first, so when a parent's turn comes every
+    sub-list has already added its members to the parent's 'child_members'
+    and no member is downloaded twice.
+    """
+    if list_data.get('children'):
+        with profile_phase('member_extraction'):
+            list_data['members'] = list(list_data.pop('child_members', {}).values())
+        log_event(
+            logging.INFO, 'monclub_members_derived',
+            list=list_data['name'], contacts=len(list_data['members']), sublists=len(list_data['children'])
+        )
+    else:
+        fetch_list_members(token, list_data)
+    
+    # Make this list's members part of its parent's union
+    parent = list_data.get('parent')
+    if parent is not None:
+        if list_data.get('members_error'):
+            parent['members_error'] = f"sub-list {list_data['name']} could not be fetched"
+        updated_at = list_data.get('updated_at')
+        if updated_at is not None and (parent.get('updated_at') is None or updated_at > parent['updated_at']):
+            parent['updated_at'] = updated_at
+        child_members = parent.setdefault('child_members', {})
+        for member in list_data['members']:
+            child_members.setdefault(member['email'], member)
+    return list_data
+
+# MonClub list hierarchy
+def build_monclub_list_tree(monclub_lists, include_sublists=False):
+    """Build the MonClub lists to sync from get_monclub_lists, ordered children-first.
+
+    Without include_sublists only top-level lists (parentId null) are kept.
+    Sub-lists are named after their full path, e.g. "MonClub Natation / Groupe 1",
+    so the Brevo lists mirror the hierarchy inside the MonClub folder.
+    """
+    entries = {}
+    for list_item in monclub_lists:
+        if not (list_item.get("name") and list_item.get("_id")):
+            continue
+        if list_item.get("parentId") is not None and not include_sublists:
+            continue
+        entries[list_item.get("_id")] = {
+            "_id": list_item.get("_id"),
+            "original_name": list_item.get("name"),
+            "parent_id": list_item.get("parentId"),
+            "children": []
+        }
+    
+    # Lists whose parent is unknown are treated as top-level lists
+    roots = []
+    for entry in entries.values():
+        parent = entries.get(entry["parent_id"]) if entry["parent_id"] is not None else None
+        if parent is not None:
+            parent["children"].append(entry)
+            entry["parent"] = parent
+        else:
+            roots.append(entry)
+    
+    ordered = []
+    def visit(entry, path):
+        names = path + [entry["original_name"]]
+        entry["name"] = "MonClub " + " / ".join(names)
+        for child in entry["children"]:
+            visit(child, names)
+        ordered.append(entry)
+    for root in roots:
+        visit(root, [])
+    return ordered
+
+def select_monclub_lists(monclub_lists_data, list_ids=(), name_patterns=(), min_members=None, max_members=None, sync_state=None):
+    """Keep the lists chosen on the command line plus the sub-lists their members are derived from, marking the latter selected=False"""
+    list_ids = set(list_ids)
+    patterns = [pattern.lower() for pattern in name_patterns]
+    known_sizes = {}
+    if sync_state is not None:
+        for list_id, state in sync_state['lists'].items():
+            known_sizes[list_id] = state['expected_count'] + state.get('blocked_count', 0)
+    
+    def matches(list_data):
+        if not list_ids and not patterns:
+            return True
+        if list_data['_id'] in list_ids:
+            return True
+        names = (list_data['name'][len('MonClub '):].lower(), list_data['original_name'].lower())
+        return any(fnmatch.fnmatchcase(name, pattern) for name in names for pattern in patterns)
+    
+    def size_ok(list_data):
+        size = known_sizes.get(list_data['_id'])
+        if size is None:
+            return True
+        return (min_members is None or size >= min_members) and (max_members is None or size <= max_members)
+    
+    # Sizes come from the sync state; lists never synced are kept and checked once fetched
+    wanted = {list_data['_id'] for list_data in monclub_lists_data if matches(list_data) and size_ok(list_data)}
+    
+    def needed(list_data):
+        while list_data is not None:
+            if list_data['_id'] in wanted:
+                return True
+            list_data = list_data.get('parent')
+        return False
+    
+    selected = [list_data for list_data in monclub_lists_data if needed(list_data)]
+    for list_data in selected:
+        # Sub-lists kept only to build a selected parent are fetched but not synced
+        list_data['selected'] = list_data['_id'] in wanted
+        # A parent that is not synced does not need the union of its sub-lists
+        if list_data.get('parent') is not None and not needed(list_data['parent']):
+            del list_data['parent']
+    return selected
 
 # Brevo API functions
+def create_brevo_api_client(configuration):
+    """Create a Brevo API client that asks for compressed responses, with default timeouts and the Brevo circuit breaker"""
+    api_client = brevo_python.ApiClient(configuration)
+    # urllib3 transparently decompresses the responses
+    api_client.set_default_header('Accept-Encoding', ACCEPT_ENCODING)
+    
+    # Every API method ends up in rest_client.request, so guard it once for all of them
+    rest_request = api_client.rest_client.request
+    def guarded_request(*args, **kwargs):
+        if not kwargs.get('_request_timeout'):
+            kwargs['_request_timeout'] = BREVO_TIMEOUT
+        return brevo_breaker.call(rest_request, *args, **kwargs)
+    api_client.rest_client.request = guarded_request
+    return api_client
+
 def get_brevo_folder_id(api_client, folder_name="MonClub"):
     """Get folder ID from Brevo by folder name"""
     try:
@@ -137,43 +738,84 @@ def get_brevo_folder_id(api_client, folder_name="MonClub"):
             folder_id_value = folder.get('id') if isinstance(folder, dict) else getattr(folder, 'id', None)
             
             if folder_name_value == folder_name:
-                print(f"  Found folder '{folder_name}' with ID: {folder_id_value}")
+                log_event(logging.INFO, 'brevo_folder_found', folder=folder_name, folder_id=folder_id_value)
                 return folder_id_value
         
-        print(f"  Warning: Folder '{folder_name}' not found, will create list without folder")
+        log_event(logging.WARNING, 'brevo_folder_missing', folder=folder_name)
         return None
     except ApiException as e:
-        print(f"  Error getting folders: {e}")
+        log_event(logging.ERROR, 'brevo_folders_error', error=e)
         return None
 
-def create_brevo_list(lists_api, list_name, folder_id=None):
-    """Create a list in Brevo and return the list ID, or return existing list ID if it already exists"""
-    try:
-        # First, check if the list already exists
-        print(f"  Checking if list '{list_name}' already exists...")
-        existing_lists = lists_api.get_lists(limit=50, offset=0)
-        
-        # Handle both dict and object responses
-        lists_list = existing_lists.lists if hasattr(existing_lists, 'lists') else existing_lists
-        
+def get_brevo_folder_lists(lists_api, folder_id):
+    """Get every list of a Brevo folder with its subscriber counts, keyed by list name"""
+    catalogue = {}
+    offset = 0
+    limit = 50  # Maximum allowed by API
+    while True:
+        response = lists_api.get_folder_lists(folder_id, limit=limit, offset=offset)
+        lists_list = response.lists if hasattr(response, 'lists') else response
+        lists_list = lists_list or []
         for lst in lists_list:
             # Handle both dict and object access
-            lst_name = lst.get('name') if isinstance(lst, dict) else getattr(lst, 'name', None)
-            lst_id = lst.get('id') if isinstance(lst, dict) else getattr(lst, 'id', None)
+            if isinstance(lst, dict):
+                entry = {
+                    'id': lst.get('id'),
+                    'name': lst.get('name'),
+                    'unique_subscribers': lst.get('uniqueSubscribers', 0)
+                }
+            else:
+                entry = {
+                    'id': getattr(lst, 'id', None),
+                    'name': getattr(lst, 'name', None),
+                    'unique_subscribers': getattr(lst, 'unique_subscribers', 0)
+                }
+            catalogue[entry['name']] = entry
+        if len(lists_list) < limit:
+            break
+        offset += limit
+    log_event(logging.DEBUG, 'brevo_catalogue_loaded', folder_id=folder_id, lists=len(catalogue))
+    return catalogue
+
+def create_brevo_list(lists_api, list_name, folder_id=None, catalogue=None):
+    """Create a list in Brevo and return the list ID, or return existing list ID if it already exists.
 
-            if lst_name == list_name:
-                print(f"  Found existing list '{list_name}' with ID: {lst_id}")
-                return lst_id
+    When the folder's catalogue (from get_brevo_folder_lists) is given, the
+    lookup uses it instead of another get_lists call, and new lists are added to it.
+    """
+    try:
+        # First, check if the list already exists
+        log_event(logging.DEBUG, 'brevo_list_lookup', list=list_name)
+        if catalogue is not None:
+            entry = catalogue.get(list_name)
+            if entry is not None:
+                log_event(logging.INFO, 'brevo_list_found', list=list_name, list_id=entry['id'])
+                return entry['id']
+        else:
+            existing_lists = lists_api.get_lists(limit=50, offset=0)
+            
+            # Handle both dict and object responses
+            lists_list = existing_lists.lists if hasattr(existing_lists, 'lists') else existing_lists
+            
+            for lst in lists_list:
+                # Handle both dict and object access
+                lst_name = lst.get('name') if isinstance(lst, dict) else getattr(lst, 'name', None)
+                lst_id = lst.get('id') if isinstance(lst, dict) else getattr(lst, 'id', None)
+
+                if lst_name == list_name:
+                    log_event(logging.INFO, 'brevo_list_found', list=list_name, list_id=lst_id)
+                    return lst_id
         
         # List doesn't exist, create it
-        print(f"  List '{list_name}' not found, creating new list...")
         create_list = brevo_python.CreateList(name=list_name, folder_id=folder_id)
         result = lists_api.create_list(create_list)
-        print(f"  Created list '{list_name}' with ID: {result.id}")
+        log_event(logging.INFO, 'brevo_list_created', list=list_name, list_id=result.id)
+        if catalogue is not None:
+            catalogue[list_name] = {'id': result.id, 'name': list_name, 'unique_subscribers': 0}
         return result.id
         
     except ApiException as e:
-        print(f"  Error creating/finding list: {e}")
+        log_event(logging.ERROR, 'brevo_list_error', list=list_name, error=e)
         raise e
 
 def create_or_update_brevo_contact(contacts_api, email, first_name, last_name, list_id=None):
@@ -271,35 +913,84 @@ def is_contact_in_list(lists_api, list_id, email):
         # If error, assume not in list and try to add
         return False
 
-def get_all_contacts_from_brevo_list(lists_api, list_id):
-    """Get all contacts from a Brevo list"""
+def get_brevo_list_page(lists_api, list_id, offset, limit):
+    """Fetch one page of a Brevo list and return (emails, page size, list count reported by Brevo)"""
+    contacts = lists_api.get_contacts_from_list(list_id, limit=limit, offset=offset)
+    contacts_list = contacts.contacts if hasattr(contacts, 'contacts') else contacts
+    contacts_list = contacts_list or []
+    total_count = getattr(contacts, 'count', None)
+    
+    page_emails = []
+    for contact in contacts_list:
+        contact_email = contact.get('email') if isinstance(contact, dict) else getattr(contact, 'email', None)
+        if contact_email:
+            page_emails.append(contact_email.lower())
+    return page_emails, len(contacts_list), total_count
+
+def read_brevo_list_serially(lists_api, list_id, emails, offset=0, limit=500):
+    """Read a Brevo list page after page starting at offset, adding emails to the set"""
+    while True:
+        page_emails, page_size, _ = get_brevo_list_page(lists_api, list_id, offset, limit)
+        emails.update(page_emails)
+        # Check if there are more contacts
+        if page_size < limit:
+            return emails
+        offset += limit
+
+def get_all_contacts_from_brevo_list(lists_api, list_id, emails=None):
+    """Get all contact emails from a Brevo list as a set, fetching pages concurrently"""
+    limit = 500  # Maximum allowed by API
+    concurrency = max(1, int(os.getenv('BREVO_PAGE_CONCURRENCY', '4')))
+    if emails is None:
+        emails = set()
+    
     try:
-        all_contacts = []
-        offset = 0
-        limit = 500  # Maximum allowed by API
+        # The first page also tells us how many contacts the list holds
+        page_emails, page_size, total_count = get_brevo_list_page(lists_api, list_id, 0, limit)
+        emails.update(page_emails)
+        if page_size < limit:
+            return emails
+        if not total_count or concurrency == 1:
+            return read_brevo_list_serially(lists_api, list_id, emails, limit, limit)
         
-        while True:
-            contacts = lists_api.get_contacts_from_list(list_id, limit=limit, offset=offset)
-            contacts_list = contacts.contacts if hasattr(contacts, 'contacts') else contacts
-            
-            if not contacts_list:
-                break
-            
-            for contact in contacts_list:
-                contact_email = contact.get('email') if isinstance(contact, dict) else getattr(contact, 'email', None)
-                if contact_email:
-                    all_contacts.append(contact_email.lower())
-            
-            # Check if there are more contacts
-            if len(contacts_list) < limit:
-                break
-            
-            offset += limit
+        # Fetch the remaining offsets with at most `concurrency` requests in flight
+        offsets = iter(range(limit, total_count, limit))
+        last_offset = limit
+        last_page_full = True
+        list_changed = False
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pending = {}
+            while True:
+                while len(pending) < concurrency:
+                    offset = next(offsets, None)
+                    if offset is None:
+                        break
+                    pending[executor.submit(get_brevo_list_page, lists_api, list_id, offset, limit)] = offset
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    offset = pending.pop(future)
+                    page_emails, page_size, page_count = future.result()
+                    emails.update(page_emails)
+                    if page_count != total_count:
+                        list_changed = True
+                    if offset >= last_offset:
+                        last_offset = offset
+                        last_page_full = page_size == limit
         
-        return all_contacts
+        if list_changed:
+            # Offsets shifted while we were reading, so some contacts may have been skipped
+            log_event(logging.WARNING, 'brevo_list_changed_during_read', list_id=list_id, expected=total_count)
+            emails.clear()
+            return read_brevo_list_serially(lists_api, list_id, emails, 0, limit)
+        if last_page_full:
+            # The list grew past the count we started with
+            return read_brevo_list_serially(lists_api, list_id, emails, last_offset + limit, limit)
+        return emails
     except ApiException as e:
-        print(f"    Error getting contacts from list: {e}")
-        return []
+        log_event(logging.ERROR, 'brevo_list_contacts_error', list_id=list_id, error=e)
+        return set()
 
 def remove_contacts_from_brevo_list(lists_api, list_id, contact_emails):
     """Remove contacts from a Brevo list by email, batching in chunks of 150"""
@@ -315,13 +1006,14 @@ def remove_contacts_from_brevo_list(lists_api, list_id, contact_emails):
                 lists_api.remove_contact_from_list(list_id, remove_contact)
                 total_removed += len(batch)
             except ApiException as e:
-                print(f"    Error removing batch {i//batch_size + 1}: {e}")
+                log_event(logging.ERROR, 'brevo_remove_batch_error', list_id=list_id, batch=i//batch_size + 1, error=e)
         
-        if total_removed > 0:
-            print(f"    Removed {total_removed} contacts from list")
+        log_event(logging.DEBUG, 'brevo_contacts_removed', list_id=list_id, removed=total_removed)
         return True
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        print(f"    Error removing contacts from list: {e}")
+        log_event(logging.ERROR, 'brevo_remove_error', list_id=list_id, error=e)
         return False
 
 def add_contacts_to_brevo_list(lists_api, list_id, contact_emails):
@@ -329,14 +1021,16 @@ def add_contacts_to_brevo_list(lists_api, list_id, contact_emails):
     try:
         # Filter out contacts that are already in the list
         contacts_to_add = []
+        skipped_count = 0
         for email in contact_emails:
             if not is_contact_in_list(lists_api, list_id, email):
                 contacts_to_add.append(email)
             else:
-                print(f"    Skipping {email}: already in list")
+                skipped_count += 1
+                log_event(logging.DEBUG, 'brevo_contact_already_in_list', list_id=list_id, email=email)
         
         if not contacts_to_add:
-            print(f"    All contacts are already in the list")
+            log_event(logging.DEBUG, 'brevo_contacts_already_in_list', list_id=list_id, skipped=skipped_count)
             return True
         
         # Process in batches of 150 (Brevo API limit)
@@ -349,85 +1043,463 @@ def add_contacts_to_brevo_list(lists_api, list_id, contact_emails):
                 add_contact = brevo_python.AddContactToList(emails=batch)
                 lists_api.add_contact_to_list(list_id, add_contact)
                 total_added += len(batch)
-                print(f"    Added batch {i//batch_size + 1} ({len(batch)} contacts)")
+                log_event(logging.DEBUG, 'brevo_add_batch', list_id=list_id, batch=i//batch_size + 1, contacts=len(batch))
             except ApiException as e:
-                print(f"    Error adding batch {i//batch_size + 1}: {e}")
+                log_event(logging.ERROR, 'brevo_add_batch_error', list_id=list_id, batch=i//batch_size + 1, error=e)
         
-        print(f"    Total: Added {total_added} new contacts to list")
+        log_event(logging.DEBUG, 'brevo_contacts_added', list_id=list_id, added=total_added, skipped=skipped_count)
         return True
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        print(f"    Error adding contacts to list: {e}")
+        log_event(logging.ERROR, 'brevo_add_error', list_id=list_id, error=e)
         return False
 
-def compare_monclub_brevo_lists(monclub_members, brevo_list_id, lists_api):
-    """Compare MonClub list with Brevo list and show differences"""
+def refresh_blocklist_index(contacts_api, transactional_api, sync_state):
+    """Update the cached index of blocklisted, bounced and unsubscribed Brevo contacts and return it as a set.
+
+    The index lives in the sync state. Marketing blocklist entries and
+    transactional blocks are kept apart, so a contact modified without being
+    blocklisted only leaves the marketing set. Normally only contacts modified
+    and blocks added since the last refresh are read; every
+    BREVO_BLOCKLIST_FULL_REFRESH_DAYS days (default 7) it is rebuilt from
+    scratch to drop transactional blocks that were lifted.
+    """
+    index = sync_state.setdefault('blocklist', {})
+    now = datetime.now(timezone.utc)
+    full_refresh_days = int(os.getenv('BREVO_BLOCKLIST_FULL_REFRESH_DAYS', '7'))
+    
+    refreshed_at = index.get('refreshed_at')
+    full_refresh_at = index.get('full_refresh_at')
+    full_refresh = (
+        not refreshed_at or not full_refresh_at
+        or 'marketing' not in index or 'transactional' not in index
+        or now - datetime.fromisoformat(full_refresh_at) > timedelta(days=full_refresh_days)
+    )
+    if full_refresh:
+        marketing = set()
+        transactional = set()
+    else:
+        marketing = set(index['marketing'])
+        transactional = set(index['transactional'])
+    
     try:
-        print("\n" + "="*60)
-        print("COMPARING MONCLUB AND BREVO LISTS")
-        print("="*60)
+        # Marketing blocklist: contacts flagged emailBlacklisted (unsubscribed, hard bounced, blocked)
+        offset = 0
+        limit = 1000  # Maximum allowed by API
+        while True:
+            kwargs = {'limit': limit, 'offset': offset}
+            if not full_refresh:
+                kwargs['modified_since'] = datetime.fromisoformat(refreshed_at).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+            response = contacts_api.get_contacts(**kwargs)
+            contacts_list = response.contacts if hasattr(response, 'contacts') else response
+            contacts_list = contacts_list or []
+            for contact in contacts_list:
+                email = contact.get('email') if isinstance(contact, dict) else getattr(contact, 'email', None)
+                blacklisted = contact.get('emailBlacklisted') if isinstance(contact, dict) else getattr(contact, 'email_blacklisted', False)
+                if not email:
+                    continue
+                if blacklisted:
+                    marketing.add(email.lower())
+                else:
+                    # Unblocked since the last refresh
+                    marketing.discard(email.lower())
+            if len(contacts_list) < limit:
+                break
+            offset += limit
         
+        # Transactional blocks: hard bounces, unsubscribes, spam complaints, admin blocks
+        offset = 0
+        limit = 100  # Maximum allowed by API
+        while True:
+            kwargs = {'limit': limit, 'offset': offset}
+            if not full_refresh:
+                kwargs['start_date'] = datetime.fromisoformat(refreshed_at).strftime('%Y-%m-%d')
+                kwargs['end_date'] = now.strftime('%Y-%m-%d')
+            response = transactional_api.get_transac_blocked_contacts(**kwargs)
+            contacts_list = response.contacts if hasattr(response, 'contacts') else response
+            contacts_list = contacts_list or []
+            for contact in contacts_list:
+                email = contact.get('email') if isinstance(contact, dict) else getattr(contact, 'email', None)
+                if email:
+                    transactional.add(email.lower())
+            if len(contacts_list) < limit:
+                break
+            offset += limit
+    except CircuitOpenError:
+        raise
+    except (ApiException, urllib3.exceptions.HTTPError) as e:
+        # Keep using the cached index; it is refreshed again on the next run
+        cached = frozenset(index.get('marketing', [])) | frozenset(index.get('transactional', []))
+        log_event(logging.WARNING, 'blocklist_refresh_error', error=e, cached=len(cached))
+        return cached
+    
+    index['marketing'] = sorted(marketing)
+    index['transactional'] = sorted(transactional)
+    index['refreshed_at'] = now.isoformat()
+    if full_refresh:
+        index['full_refresh_at'] = now.isoformat()
+    emails = frozenset(marketing | transactional)
+    log_event(
+        logging.INFO, 'blocklist_refreshed',
+        full=full_refresh, contacts=len(emails), marketing=len(marketing), transactional=len(transactional)
+    )
+    return emails
+
+class ListDiff:
+    """Membership diff between a MonClub list and a Brevo list.
+
+    Contacts are kept in memory until the two sides together hold more than
+    spill_threshold emails, then everything moves to a temporary on-disk
+    SQLite database and the differences are computed with indexed sorted
+    merges, so memory stays flat whatever the size of the lists.
+    Contacts in excluded_emails (blocklisted or bounced in Brevo) are never
+    planned for addition; they are counted separately as blocked.
+    """
+
+    def __init__(self, spill_threshold=None, excluded_emails=None):
+        if spill_threshold is None:
+            spill_threshold = int(os.getenv('DIFF_SPILL_THRESHOLD', '50000'))
+        self.spill_threshold = spill_threshold
+        self.excluded_emails = excluded_emails or frozenset()
+        self.monclub_contacts = {}  # Map email to (firstName, lastName)
+        self.brevo_emails = set()
+        self.db = None
+
+    @property
+    def spilled(self):
+        return self.db is not None
+
+    def _spill(self):
+        """Move the in-memory contacts to a temporary SQLite database"""
+        # An empty filename gives a private on-disk database that is deleted on close
+        self.db = sqlite3.connect('')
+        self.db.execute('PRAGMA journal_mode = OFF')
+        self.db.execute('PRAGMA synchronous = OFF')
+        self.db.execute('CREATE TABLE monclub (email TEXT PRIMARY KEY, first_name TEXT, last_name TEXT) WITHOUT ROWID')
+        self.db.execute('CREATE TABLE brevo (email TEXT PRIMARY KEY) WITHOUT ROWID')
+        self.db.execute('CREATE TABLE excluded (email TEXT PRIMARY KEY) WITHOUT ROWID')
+        self.db.executemany('INSERT OR IGNORE INTO excluded VALUES (?)', ((email,) for email in self.excluded_emails))
+        self.db.executemany(
+            'INSERT OR REPLACE INTO monclub VALUES (?, ?, ?)',
+            ((email, names[0], names[1]) for email, names in self.monclub_contacts.items())
+        )
+        self.db.executemany('INSERT OR IGNORE INTO brevo VALUES (?)', ((email,) for email in self.brevo_emails))
+        self.monclub_contacts = {}
+        self.brevo_emails = set()
+        log_event(logging.INFO, 'diff_spilled_to_disk', threshold=self.spill_threshold)
+
+    def _check_spill(self):
+        if not self.spilled and len(self.monclub_contacts) + len(self.brevo_emails) > self.spill_threshold:
+            self._spill()
+
+    def add_monclub_members(self, members):
+        """Add MonClub members (dicts with email, firstName, lastName), spilling as soon as the threshold is crossed"""
+        rows = (
+            (member.get('email', '').strip().lower(), member.get('firstName', ''), member.get('lastName', ''))
+            for member in members
+        )
+        rows = (row for row in rows if row[0])
+        # A list already over the threshold goes straight to disk
+        if not self.spilled and len(members) > self.spill_threshold:
+            self._spill()
+        if not self.spilled:
+            for email, first_name, last_name in rows:
+                self.monclub_contacts[email] = (first_name, last_name)
+                self._check_spill()
+                if self.spilled:
+                    break
+        if self.spilled:
+            # Stream the remaining rows without building an intermediate list
+            self.db.executemany('INSERT OR REPLACE INTO monclub VALUES (?, ?, ?)', rows)
+
+    def update(self, brevo_emails):
+        """Add Brevo list emails (lets the diff be used as the pagination sink)"""
+        if self.spilled:
+            self.db.executemany('INSERT OR IGNORE INTO brevo VALUES (?)', ((email,) for email in brevo_emails))
+            return
+        self.brevo_emails.update(brevo_emails)
+        self._check_spill()
+
+    def clear(self):
+        """Forget the Brevo side (used when a list has to be re-read)"""
+        if self.spilled:
+            self.db.execute('DELETE FROM brevo')
+        else:
+            self.brevo_emails = set()
+
+    def counts(self):
+        """Return the sizes of both sides and of their intersection"""
+        if self.spilled:
+            monclub_count = self.db.execute('SELECT COUNT(*) FROM monclub').fetchone()[0]
+            brevo_count = self.db.execute('SELECT COUNT(*) FROM brevo').fetchone()[0]
+            in_both = self.db.execute('SELECT COUNT(*) FROM monclub JOIN brevo USING (email)').fetchone()[0]
+            blocked_count = self.db.execute(
+                'SELECT COUNT(*) FROM monclub JOIN excluded USING (email) '
+                'WHERE NOT EXISTS (SELECT 1 FROM brevo WHERE brevo.email = monclub.email)'
+            ).fetchone()[0]
+        else:
+            monclub_count = len(self.monclub_contacts)
+            brevo_count = len(self.brevo_emails)
+            in_both = sum(1 for email in self.brevo_emails if email in self.monclub_contacts)
+            # Walk the smaller of the two collections
+            smaller, larger = sorted((self.excluded_emails, self.monclub_contacts), key=len)
+            blocked_count = sum(1 for email in smaller if email in larger and email not in self.brevo_emails)
+        return {
+            'monclub_count': monclub_count,
+            'brevo_count': brevo_count,
+            'in_both': in_both,
+            'blocked_count': blocked_count,
+            'to_add_count': monclub_count - in_both - blocked_count,
+            'to_remove_count': brevo_count - in_both
+        }
+
+    def iter_to_add(self, chunk_size, sort=False):
+        """Yield chunks of contacts (email, firstName, lastName) in MonClub but not in Brevo"""
+        if self.spilled:
+            cursor = self.db.execute(
+                'SELECT email, first_name, last_name FROM monclub '
+                'WHERE NOT EXISTS (SELECT 1 FROM brevo WHERE brevo.email = monclub.email) '
+                'AND NOT EXISTS (SELECT 1 FROM excluded WHERE excluded.email = monclub.email) ORDER BY email'
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield rows
+        emails = [
+            email for email in self.monclub_contacts
+            if email not in self.brevo_emails and email not in self.excluded_emails
+        ]
+        if sort:
+            emails.sort()
+        for i in range(0, len(emails), chunk_size):
+            yield [(email,) + self.monclub_contacts[email] for email in emails[i:i + chunk_size]]
+
+    def iter_to_remove(self, chunk_size, sort=False):
+        """Yield chunks of emails in Brevo but not in MonClub"""
+        if self.spilled:
+            cursor = self.db.execute(
+                'SELECT email FROM brevo '
+                'WHERE NOT EXISTS (SELECT 1 FROM monclub WHERE monclub.email = brevo.email) ORDER BY email'
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield [row[0] for row in rows]
+        emails = [email for email in self.brevo_emails if email not in self.monclub_contacts]
+        if sort:
+            emails.sort()
+        for i in range(0, len(emails), chunk_size):
+            yield emails[i:i + chunk_size]
+
+    def close(self):
+        """Release the contacts held by the diff"""
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+        self.monclub_contacts = {}
+        self.brevo_emails = set()
+
+def compare_monclub_brevo_lists(monclub_members, brevo_list_id, lists_api, read_brevo=True, excluded_emails=None):
+    """Compare MonClub list with Brevo list and log the differences.
+
+    Returns the counts together with the ListDiff holding the contacts to add
+    and remove; the caller must close the diff once it has been applied.
+    With read_brevo=False (the Brevo list is known to be empty) the Brevo
+    list is not paginated at all. Contacts in excluded_emails are never planned for addition.
+    """
+    diff = ListDiff(excluded_emails=excluded_emails)
+    try:
         # Get MonClub contact emails (normalized to lowercase)
-        monclub_emails = set()
-        monclub_contact_map = {}  # Map email to contact info
-        for member in monclub_members:
-            email = member.get('email', '').strip().lower()
-            if email:
-                monclub_emails.add(email)
-                monclub_contact_map[email] = {
-                    'firstName': member.get('firstName', ''),
-                    'lastName': member.get('lastName', '')
-                }
-        
-        print(f"\nMonClub list:")
-        print(f"  Total contacts: {len(monclub_emails)}")
+        diff.add_monclub_members(monclub_members)
         
-        # Get Brevo list contacts
-        brevo_emails = set(get_all_contacts_from_brevo_list(lists_api, brevo_list_id))
-        print(f"\nBrevo list:")
-        print(f"  Total contacts: {len(brevo_emails)}")
+        # Get Brevo list contacts, streamed straight into the diff
+        if read_brevo:
+            get_all_contacts_from_brevo_list(lists_api, brevo_list_id, diff)
         
         # Find differences
-        to_add = monclub_emails - brevo_emails  # In MonClub but not in Brevo
-        to_remove = brevo_emails - monclub_emails  # In Brevo but not in MonClub
-        in_both = monclub_emails & brevo_emails  # In both lists
-        
-        print(f"\nComparison results:")
-        print(f"  Contacts in both lists: {len(in_both)}")
-        print(f"  Contacts to ADD to Brevo: {len(to_add)}")
-        print(f"  Contacts to REMOVE from Brevo: {len(to_remove)}")
-        
-        # Show details
-        if to_add:
-            print(f"\n  Contacts to ADD ({len(to_add)}):")
-            for i, email in enumerate(sorted(to_add), 1):
-                contact_info = monclub_contact_map.get(email, {})
-                name = f"{contact_info.get('firstName', '')} {contact_info.get('lastName', '')}".strip()
-                if name:
-                    print(f"    {i}. {email} ({name})")
-                else:
-                    print(f"    {i}. {email}")
-        
-        if to_remove:
-            print(f"\n  Contacts to REMOVE ({len(to_remove)}):")
-            for i, email in enumerate(sorted(to_remove), 1):
-                print(f"    {i}. {email}")
+        counts = diff.counts()
+        log_event(
+            logging.INFO, 'lists_compared',
+            list_id=brevo_list_id,
+            monclub=counts['monclub_count'],
+            brevo=counts['brevo_count'],
+            in_both=counts['in_both'],
+            to_add=counts['to_add_count'],
+            to_remove=counts['to_remove_count'],
+            blocked=counts['blocked_count'],
+            spilled=diff.spilled
+        )
         
-        if not to_add and not to_remove:
-            print(f"\n  ✓ Lists are perfectly synchronized!")
+        # Show details (sorting is only worth it when debug output is enabled)
+        if logger.isEnabledFor(logging.DEBUG):
+            for chunk in diff.iter_to_add(DIFF_CHUNK_SIZE, sort=True):
+                for email, first_name, last_name in chunk:
+                    name = f"{first_name} {last_name}".strip()
+                    log_event(logging.DEBUG, 'contact_to_add', list_id=brevo_list_id, email=email, name=name)
+            for chunk in diff.iter_to_remove(DIFF_CHUNK_SIZE, sort=True):
+                for email in chunk:
+                    log_event(logging.DEBUG, 'contact_to_remove', list_id=brevo_list_id, email=email)
         
-        return {
-            'monclub_count': len(monclub_emails),
-            'brevo_count': len(brevo_emails),
-            'in_both': len(in_both),
-            'to_add': list(to_add),
-            'to_remove': list(to_remove),
-            'monclub_contact_map': monclub_contact_map
-        }
+        counts['diff'] = diff
+        return counts
         
+    except CircuitOpenError:
+        raise
     except Exception as e:
-        print(f"  Error comparing lists: {e}")
+        diff.close()
+        log_event(logging.ERROR, 'compare_error', list_id=brevo_list_id, error=e)
         return None
 
+class ImportJobTracker:
+    """Submit Brevo contact imports and track their background processes across lists.
+
+    Imports are fire-and-forget: submit() returns as soon as Brevo has
+    accepted the job, poll_due() checks every pending process in one
+    get_processes call once the backoff delay has passed, and wait_all()
+    blocks at the end of the run. process_api, clock and sleep can be
+    replaced by fakes to simulate delayed job completion.
+    """
+
+    def __init__(self, process_api, chunk_size=5000, poll_interval=2.0, max_poll_interval=30.0,
+                 timeout=1800.0, clock=time.monotonic, sleep=time.sleep):
+        self.process_api = process_api
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.clock = clock
+        self.sleep = sleep
+        self.jobs = []
+        self.current_interval = poll_interval
+        self.next_poll_at = None
+
+    @property
+    def pending_jobs(self):
+        return [job for job in self.jobs if job['status'] in ('queued', 'in_process')]
+
+    def submit(self, contacts_api, list_name, list_id, contacts):
+        """Start a background import of (email, firstName, lastName) rows into a Brevo list"""
+        job = {
+            'list': list_name,
+            'list_id': list_id,
+            'contacts': len(contacts),
+            'process_id': None,
+            'status': 'queued',
+            'submitted_at': self.clock(),
+            'duration': None,
+            'error': None
+        }
+        self.jobs.append(job)
+        
+        file_body = io.StringIO()
+        writer = csv.writer(file_body, delimiter=';', lineterminator='\n')
+        writer.writerow(['EMAIL', 'FIRSTNAME', 'LASTNAME'])
+        for email, first_name, last_name in contacts:
+            writer.writerow([email, (first_name or '').strip(), (last_name or '').strip()])
+        
+        try:
+            request_contact_import = brevo_python.RequestContactImport(
+                file_body=file_body.getvalue(),
+                list_ids=[list_id],
+                update_existing_contacts=True,
+                empty_contacts_attributes=False
+            )
+            result = contacts_api.import_contacts(request_contact_import)
+            job['process_id'] = result.process_id if hasattr(result, 'process_id') else result.get('processId')
+            log_event(logging.DEBUG, 'import_submitted', list=list_name, process_id=job['process_id'], contacts=len(contacts))
+        except ApiException as e:
+            self._finish(job, 'failed', error=e)
+        
+        # A new job resets the backoff so it is checked soon
+        self.current_interval = self.poll_interval
+        if self.next_poll_at is None or self.next_poll_at > job['submitted_at'] + self.poll_interval:
+            self.next_poll_at = job['submitted_at'] + self.poll_interval
+        return job
+
+    def _finish(self, job, status, error=None):
+        job['status'] = status
+        job['duration'] = self.clock() - job['submitted_at']
+        job['error'] = str(error) if error else None
+        level = logging.INFO if status == 'completed' else logging.ERROR
+        log_event(
+            level, 'import_finished',
+            list=job['list'], process_id=job['process_id'], status=status,
+            contacts=job['contacts'], duration=round(job['duration'], 1), error=job['error']
+        )
+
+    def _check_timeout(self, job):
+        """Give up on a job still pending after the timeout"""
+        if self.clock() - job['submitted_at'] > self.timeout:
+            self._finish(job, 'timeout', error=f"still {job['status']} after {self.timeout:.0f}s")
+
+    def poll(self):
+        """Check the status of all pending processes at once"""
+        pending = self.pending_jobs
+        if not pending:
+            return
+        try:
+            # The most recent processes cover our pending jobs in one call
+            response = self.process_api.get_processes(limit=50, offset=0, sort='desc')
+            processes = response.processes if hasattr(response, 'processes') else response.get('processes')
+            statuses = {}
+            for process in processes or []:
+                process_id = process.get('id') if isinstance(process, dict) else getattr(process, 'id', None)
+                status = process.get('status') if isinstance(process, dict) else getattr(process, 'status', None)
+                statuses[process_id] = status
+        except ApiException as e:
+            log_event(logging.WARNING, 'import_poll_error', error=e)
+            # A poll that keeps failing must not keep the jobs pending forever
+            for job in pending:
+                self._check_timeout(job)
+            return
+        
+        for job in pending:
+            status = statuses.get(job['process_id'])
+            if status is None:
+                # Older than the most recent page, ask for this process directly
+                try:
+                    process = self.process_api.get_process(job['process_id'])
+                    status = process.get('status') if isinstance(process, dict) else getattr(process, 'status', None)
+                except ApiException as e:
+                    self._finish(job, 'failed', error=e)
+                    continue
+            if status == 'completed':
+                self._finish(job, 'completed')
+            elif status in ('queued', 'in_process'):
+                job['status'] = status
+                self._check_timeout(job)
+            else:
+                self._finish(job, 'failed', error=f"unexpected status {status}")
+
+    def poll_due(self):
+        """Poll if the backoff delay has passed, without blocking"""
+        if self.next_poll_at is None or not self.pending_jobs or self.clock() < self.next_poll_at:
+            return
+        self.poll()
+        self.current_interval = min(self.current_interval * 2, self.max_poll_interval)
+        self.next_poll_at = self.clock() + self.current_interval
+
+    def wait_all(self):
+        """Block until every submitted job has finished, failed or timed out"""
+        while self.pending_jobs:
+            delay = max(0.0, (self.next_poll_at or self.clock()) - self.clock())
+            if delay:
+                self.sleep(delay)
+            self.next_poll_at = self.clock()
+            self.poll_due()
+
+    def report(self):
+        """Summarize the jobs for the run report"""
+        return {
+            'total': len(self.jobs),
+            'completed': sum(1 for job in self.jobs if job['status'] == 'completed'),
+            'failed': [job for job in self.jobs if job['status'] in ('failed', 'timeout')],
+            'jobs': self.jobs
+        }
+
 def send_sync_results_email(success=True, error_type=None, error_message=None, sync_summary=None, start_time=None, end_time=None):
     """Send email notification to admin about sync results using Brevo SMTP API"""
     try:
@@ -440,13 +1512,12 @@ def send_sync_results_email(success=True, error_type=None, error_message=None, s
         
         # Check if email notification is configured
         if not all([brevo_api_key, admin_email, sender_email]):
-            print("  Warning: Email notification not configured. Missing required environment variables.")
-            print("  Required: BREVO_API_KEY, ADMIN_EMAIL, BREVO_SENDER_EMAIL")
+            log_event(logging.WARNING, 'notification_not_configured', required='BREVO_API_KEY,ADMIN_EMAIL,BREVO_SENDER_EMAIL')
             return False
         
         # If configured to only send on errors and this is a success, skip sending
         if success and email_on_error_only:
-            print("  Email notification skipped (BREVO_EMAIL_ON_ERROR_ONLY is enabled)")
+            log_event(logging.INFO, 'notification_skipped', reason='BREVO_EMAIL_ON_ERROR_ONLY')
             return False
         
         # Build email content
@@ -471,11 +1542,46 @@ def send_sync_results_email(success=True, error_type=None, error_message=None, s
                 body_parts.append(f"  Total lists: {sync_summary.get('total_lists', 'N/A')}")
                 body_parts.append(f"  Successfully synced: {sync_summary.get('synced_count', 'N/A')}")
                 body_parts.append(f"  Failed: {sync_summary.get('failed_count', 'N/A')}")
+                body_parts.append(f"  Skipped by the list selection: {sync_summary.get('skipped_count', 'N/A')}")
+            
+            # Post-sync count verification
+            verification = sync_summary.get('verification') if sync_summary else None
+            verification_html = ''
+            if verification:
+                body_parts.append(f"  Verified against Brevo counts: {verification['verified']}")
+                body_parts.append(f"  Reconciled after a count mismatch: {verification['reconciled']}/{verification['mismatched']}")
+                verification_html = (
+                    f"<p><strong>Verified against Brevo counts:</strong> {verification['verified']}<br>"
+                    f"<strong>Reconciled after a count mismatch:</strong> {verification['reconciled']}/{verification['mismatched']}</p>"
+                )
+            
+            # Contacts left out because Brevo blocklisted them or they bounced
+            blocked_count = sync_summary.get('blocked_count') if sync_summary else None
+            if blocked_count:
+                body_parts.append(f"  Skipped blocklisted/bounced contacts: {blocked_count}")
+                verification_html += f"<p><strong>Skipped blocklisted/bounced contacts:</strong> {blocked_count}</p>"
+            
+            # Background import jobs (bulk mode only)
+            import_report = sync_summary.get('import_report') if sync_summary else None
+            import_lines = []
+            if import_report:
+                import_lines.append(f"Jobs: {import_report['total']} ({import_report['completed']} completed, {len(import_report['failed'])} failed)")
+                for job in import_report['jobs']:
+                    duration_text = f"{job['duration']:.1f}s" if job['duration'] is not None else 'N/A'
+                    job_line = f"{job['list']}: {job['contacts']} contacts, {job['status']} in {duration_text}"
+                    if job['error']:
+                        job_line += f" ({job['error']})"
+                    import_lines.append(job_line)
+                body_parts.append(f"\n\nBackground Imports:")
+                body_parts.extend(f"  {line}" for line in import_lines)
             
             body_parts.append(f"\n" + "="*60)
             body_parts.append("\nAll lists have been synchronized successfully.")
             
             text_content = '\n'.join(body_parts)
+            import_html = ''
+            if import_lines:
+                import_html = '<h3>Background Imports</h3><ul>' + ''.join(f'<li>{line}</li>' for line in import_lines) + '</ul>'
             
             # HTML version
             html_content = f"""<html>
@@ -486,7 +1592,9 @@ def send_sync_results_email(success=True, error_type=None, error_message=None, s
 <p><strong>Start Time:</strong> {start_time.strftime('%Y-%m-%d %H:%M:%S') if start_time else 'N/A'}</p>
 <p><strong>End Time:</strong> {end_time.strftime('%Y-%m-%d %H:%M:%S') if end_time else 'N/A'}</p>
 <p><strong>Duration:</strong> {end_time - start_time if (start_time and end_time) else 'N/A'}</p>
-{f'<h3>Sync Summary</h3><ul><li>Total lists: {sync_summary.get("total_lists", "N/A")}</li><li>Successfully synced: {sync_summary.get("synced_count", "N/A")}</li><li>Failed: {sync_summary.get("failed_count", "N/A")}</li></ul>' if sync_summary else ''}
+{f'<h3>Sync Summary</h3><ul><li>Total lists: {sync_summary.get("total_lists", "N/A")}</li><li>Successfully synced: {sync_summary.get("synced_count", "N/A")}</li><li>Failed: {sync_summary.get("failed_count", "N/A")}</li><li>Skipped by the list selection: {sync_summary.get("skipped_count", "N/A")}</li></ul>' if sync_summary else ''}
+{verification_html}
+{import_html}
 <hr>
 <p>All lists have been synchronized successfully.</p>
 </body>
@@ -554,379 +1662,648 @@ def send_sync_results_email(success=True, error_type=None, error_message=None, s
         }
         
         # Send email via Brevo API
-        response = requests.post(api_url, json=payload, headers=headers)
+        response = requests.post(api_url, json=payload, headers=headers, timeout=NOTIFICATION_TIMEOUT)
         response.raise_for_status()
         
-        print(f"  Sync results email sent successfully to {admin_email}")
+        log_event(logging.INFO, 'notification_sent', to=admin_email)
         return True
         
     except requests.exceptions.RequestException as e:
-        print(f"  Failed to send sync results email: {e}")
+        error_details = None
         if hasattr(e, 'response') and e.response is not None:
             try:
                 error_details = e.response.json()
-                print(f"  Error details: {error_details}")
             except:
-                print(f"  Response: {e.response.text}")
+                error_details = e.response.text
+        log_event(logging.ERROR, 'notification_failed', error=e, details=error_details)
         return False
     except Exception as e:
-        print(f"  Error sending sync results email: {e}")
+        log_event(logging.ERROR, 'notification_error', error=e)
         return False
 
-# Main execution
-start_time = datetime.now()
-try:
-    # Print start timestamp
-    print("="*60)
-    print(f"SYNC SCRIPT STARTED")
-    print(f"Start time: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    print("="*60)
-    print()
-    
-    # Step 1: Authenticate to MonClub API
-    print("Authenticating to MonClub API...")
-    monclub_token = authenticate_monclub()
-    print(f"Authentication successful. Token stored.")
-    
-    # Step 2: Get lists from MonClub API
-    print("\nFetching lists from MonClub API...")
-    monclub_lists = get_monclub_lists(monclub_token)
-    
-    # Step 3: Extract all lists with _id and name (prefixed with "MonClub ")
-    # Only include lists where parentId is null (top-level MonClub lists)
-    monclub_lists_data = []
-    for list_item in monclub_lists:
-        # Only process lists with parentId: null (top-level lists)
-        if list_item.get("name") and list_item.get("_id") and list_item.get("parentId") is None:
-            monclub_lists_data.append({
-                "_id": list_item.get("_id"),
-                "name": f"MonClub {list_item.get('name')}",
-                "original_name": list_item.get("name")
-            })
-    
-    print(f"\nFound {len(monclub_lists_data)} lists:")
-    for list_data in monclub_lists_data:
-        print(f"  - {list_data['name']} (ID: {list_data['_id']})")
+# Sync state: what each list looked like after its last verified sync
+def get_sync_state_path():
+    """Get the sync state file path from SYNC_STATE_FILE"""
+    return os.getenv('SYNC_STATE_FILE', '.sync_state.json')
+
+def load_sync_state():
+    """Load the sync state saved by the previous run (empty if there is none)"""
+    path = get_sync_state_path()
+    try:
+        with open(path) as state_file:
+            state = json.load(state_file)
+    except FileNotFoundError:
+        state = {}
+    except (OSError, ValueError) as e:
+        log_event(logging.WARNING, 'sync_state_unreadable', path=path, error=e)
+        state = {}
+    state.setdefault('lists', {})
+    return state
+
+def save_sync_state(state):
+    """Save the sync state atomically"""
+    path = get_sync_state_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as state_file:
+        json.dump(state, state_file, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def monclub_fingerprint(members, excluded_emails=frozenset()):
+    """Return (fingerprint, count) of the unique emails of a MonClub list, independent of their order.
+
+    Excluded (blocklisted) emails are left out of the fingerprint, so a
+    contact leaving the blocklist makes the list count as changed.
+    """
+    emails = {member.get('email', '').strip().lower() for member in members}
+    emails.discard('')
+    emails -= excluded_emails
+    total = 0
+    for email in emails:
+        total += int.from_bytes(hashlib.blake2b(email.encode('utf-8'), digest_size=16).digest(), 'big')
+    return f"{total % (1 << 128):032x}", len(emails)
+
+def record_list_state(sync_state, list_data):
+    """Remember a verified list so the next run can skip it if nothing changed"""
+    sync_state['lists'][list_data['_id']] = {
+        'name': list_data['name'],
+        'brevo_list_id': list_data['brevo_list_id'],
+        'fingerprint': list_data['fingerprint'],
+        'expected_count': list_data['expected_count'],
+        'blocked_count': list_data.get('blocked_count', 0),
+        'synced_at': datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+# Sync functions
+@dataclass
+class SyncOptions:
+    """Run options of sync_single_list: blocklisted emails and the command line selection (see parse_args)"""
+    excluded_emails: frozenset = frozenset()
+    min_members: int = None
+    max_members: int = None
+    changed_since: datetime = None
+    changed_only: bool = False
+
+def sync_single_list(list_data, folder_id, lists_api, contacts_api, job_tracker=None, catalogue=None, sync_state=None,
+                     options=None, force_full=False):
+    """Sync a single MonClub list to Brevo; returns True when in sync, False on failure and None when skipped by the options"""
+    options = options or SyncOptions()
+    excluded_emails = options.excluded_emails
+    list_name = list_data.get('name', '')
+    members = list_data.get('members', [])
     
-    # Step 4: Get members for each list
-    print("\nFetching members for each list...")
-    for list_data in monclub_lists_data:
-        print(f"\nGetting members for: {list_data['name']}...")
-        try:
-            members_response = get_monclub_list_members(monclub_token, list_data['_id'])
-            # Extract email, firstName, and lastName from each member
-            # Also extract emails from tutors
-            extracted_members = []
-            if isinstance(members_response, list):
-                for member in members_response:
-                    if isinstance(member, dict):
-                        # Extract member's own email
-                        member_email = member.get("email", "").strip().lower()
-                        if member_email:
-                            extracted_member = {
-                                "email": member_email,
-                                "firstName": member.get("firstName", ""),
-                                "lastName": member.get("lastName", "")
-                            }
-                            extracted_members.append(extracted_member)
-                        
-                        # Extract tutor emails
-                        tutors = member.get("tutors", [])
-                        if isinstance(tutors, list):
-                            for tutor in tutors:
-                                if isinstance(tutor, dict):
-                                    tutor_email = tutor.get("email", "").strip().lower()
-                                    if tutor_email:
-                                        # Parse fullName to get firstName and lastName
-                                        full_name = tutor.get("fullName", "").strip()
-                                        name_parts = full_name.split(maxsplit=1) if full_name else []
-                                        tutor_first_name = name_parts[0] if len(name_parts) > 0 else ""
-                                        tutor_last_name = name_parts[1] if len(name_parts) > 1 else ""
-                                        
-                                        extracted_tutor = {
-                                            "email": tutor_email,
-                                            "firstName": tutor_first_name,
-                                            "lastName": tutor_last_name
-                                        }
-                                        extracted_members.append(extracted_tutor)
-            
-            # Store extracted members in the list_data dictionary
-            list_data['members'] = extracted_members
-            member_count = len(extracted_members)
-            print(f"  Found {member_count} contacts with email addresses (members + tutors)")
-        except Exception as e:
-            print(f"  Error fetching members: {e}")
-            list_data['members'] = []
-    
-    # Step 5: Configure Brevo API
-    print("\nConfiguring Brevo API...")
-    configuration = brevo_python.Configuration()
-    configuration.api_key['api-key'] = os.getenv('BREVO_API_KEY')
-    
-    # Step 6: Get account information from Brevo
-    api_instance = brevo_python.AccountApi(brevo_python.ApiClient(configuration))
-    api_response = api_instance.get_account()
-    print("\nBrevo account information:")
-    pprint(api_response)
-    
-    # Step 7: Get existing lists from Brevo
-    from brevo_python.api.lists_api import ListsApi
-    brevo_lists_api = ListsApi(brevo_python.ApiClient(configuration))
-    brevo_lists = brevo_lists_api.get_lists()
-    print("\nExisting Brevo lists:")
-    pprint(brevo_lists)
-    
-    print(f"\nMonClub lists to sync:")
-    for list_data in monclub_lists_data:
-        member_count = len(list_data.get('members', [])) if isinstance(list_data.get('members'), list) else 0
-        print(f"  - {list_data['name']} (ID: {list_data['_id']}, Members: {member_count})")
-        # Show first 3 members as sample
-        if member_count > 0:
-            print(f"    Sample members:")
-            for member in list_data['members'][:3]:
-                print(f"      - {member.get('firstName', '')} {member.get('lastName', '')} ({member.get('email', '')})")
-            if member_count > 3:
-                print(f"      ... and {member_count - 3} more")
-    
-    # Step 8: Sync all MonClub lists to Brevo
-    print("\n" + "="*60)
-    print("SYNCING ALL MONCLUB LISTS TO BREVO")
-    print("="*60)
-    
-    # Get the MonClub folder ID (once for all lists)
-    print(f"\nRetrieving MonClub folder from Brevo...")
-    api_client = brevo_python.ApiClient(configuration)
-    monclub_folder_id = get_brevo_folder_id(api_client, "MonClub")
+    # A parent list built from incomplete sub-lists would remove their members from Brevo
+    if list_data.get('members_error') and list_data.get('children'):
+        log_event(logging.ERROR, 'list_failed', list=list_name, reason=list_data['members_error'])
+        return False
     
-    if not monclub_folder_id:
-        print("  Error: MonClub folder not found. Please create it in Brevo first.")
-        raise Exception("MonClub folder not found")
+    # Skip if no members in MonClub
+    if len(members) == 0:
+        log_event(logging.INFO, 'list_skipped', list=list_name, reason='no_members')
+        return True
     
-    from brevo_python.api.contacts_api import ContactsApi
-    brevo_contacts_api = ContactsApi(brevo_python.ApiClient(configuration))
+    # Lists left out by the command line selection are not touched in Brevo
+    if not force_full:
+        if list_data.get('selected') is False:
+            log_event(logging.INFO, 'list_skipped', list=list_name, reason='not_selected')
+            return None
+        min_members = options.min_members
+        max_members = options.max_members
+        if min_members is not None or max_members is not None:
+            size = len({member['email'] for member in members})
+            if (min_members is not None and size < min_members) or (max_members is not None and size > max_members):
+                log_event(logging.INFO, 'list_skipped', list=list_name, reason='size', contacts=size)
+                return None
+        changed_since = options.changed_since
+        if changed_since is not None and (list_data.get('updated_at') is None or list_data['updated_at'] < changed_since):
+            log_event(logging.INFO, 'list_skipped', list=list_name, reason='not_changed_since', updated_at=list_data.get('updated_at'))
+            return None
     
-    # Function to sync a single list
-    def sync_single_list(list_data, folder_id, lists_api, contacts_api):
-        """Sync a single MonClub list to Brevo"""
-        list_name = list_data.get('name', '')
-        members = list_data.get('members', [])
+    try:
+        fingerprint, _ = monclub_fingerprint(members, excluded_emails)
         
-        print(f"\n{'='*60}")
-        print(f"Syncing: {list_name}")
-        print(f"{'='*60}")
-        print(f"Members to sync: {len(members)}")
+        # In changed-only mode a list identical to its last verified sync is left alone
+        previous = sync_state['lists'].get(list_data['_id']) if sync_state is not None else None
+        if not force_full and options.changed_only and previous is not None and previous['fingerprint'] == fingerprint:
+            log_event(logging.INFO, 'list_skipped', list=list_name, reason='fingerprint_unchanged')
+            return None
         
-        # Skip if no members in MonClub
-        if len(members) == 0:
-            print(f"\n  Skipping: No members in MonClub list, not creating in Brevo")
+        # Skip the list if MonClub did not change and Brevo still has the count we left it with
+        catalogue_entry = catalogue.get(list_name) if catalogue is not None else None
+        if (not force_full and catalogue_entry is not None and previous is not None
+                and previous['fingerprint'] == fingerprint
+                and previous['brevo_list_id'] == catalogue_entry['id']
+                and previous['expected_count'] == catalogue_entry['unique_subscribers']):
+            list_data['brevo_list_id'] = catalogue_entry['id']
+            list_data['fingerprint'] = fingerprint
+            list_data['expected_count'] = previous['expected_count']
+            list_data['blocked_count'] = previous.get('blocked_count', 0)
+            log_event(logging.INFO, 'list_unchanged', list=list_name, list_id=catalogue_entry['id'], total=catalogue_entry['unique_subscribers'])
             return True
         
-        try:
-            # Create or find the list in Brevo
-            print(f"\nCreating/finding list in Brevo: {list_name}...")
-            brevo_list_id = create_brevo_list(lists_api, list_name, folder_id)
-            
-            # Compare lists before syncing
+        # Create or find the list in Brevo
+        with profile_phase('brevo_catalogue'):
+            brevo_list_id = create_brevo_list(lists_api, list_name, folder_id, catalogue)
+        
+        # An empty Brevo list does not need to be paginated; force_full always reads it
+        read_brevo = True
+        if not force_full and catalogue is not None:
+            read_brevo = catalogue[list_name]['unique_subscribers'] > 0
+        
+        # Compare lists before syncing
+        with profile_phase('diff'):
             comparison_result = compare_monclub_brevo_lists(
                 members,
                 brevo_list_id,
-                lists_api
+                lists_api,
+                read_brevo,
+                excluded_emails
             )
-            
-            if not comparison_result:
-                print("\n  Error: Could not compare lists. Skipping this list.")
-                return False
-            
-            # Use comparison results to sync
-            contacts_to_add = comparison_result.get('to_add', [])
-            contacts_to_remove = comparison_result.get('to_remove', [])
-            monclub_contact_map = comparison_result.get('monclub_contact_map', {})
-            
+        
+        if not comparison_result:
+            log_event(logging.ERROR, 'list_failed', list=list_name, reason='compare_failed')
+            return False
+        
+        # Use comparison results to sync, streaming the diff in chunks
+        diff = comparison_result['diff']
+        to_add_count = comparison_result['to_add_count']
+        to_remove_count = comparison_result['to_remove_count']
+        try:
             # Step 1: Add new contacts from MonClub
-            if contacts_to_add:
-                print(f"\nAdding {len(contacts_to_add)} new contacts to Brevo...")
+            if to_add_count and job_tracker is not None:
+                # Bulk mode: import them in the background and move on
+                with profile_phase('adds'):
+                    for chunk in diff.iter_to_add(job_tracker.chunk_size):
+                        job_tracker.submit(contacts_api, list_name, brevo_list_id, chunk)
+                log_event(logging.INFO, 'imports_submitted', list=list_name, contacts=to_add_count)
+            elif to_add_count:
                 success_count = 0
                 error_count = 0
+                i = 0
                 
-                for i, email in enumerate(contacts_to_add, 1):
-                    try:
-                        # Get contact info from MonClub
-                        contact_info = monclub_contact_map.get(email, {})
-                        first_name = contact_info.get('firstName', '').strip()
-                        last_name = contact_info.get('lastName', '').strip()
-                        
-                        # Create/update contact in Brevo
-                        contact_id = create_or_update_brevo_contact(
-                            contacts_api, 
-                            email, 
-                            first_name, 
-                            last_name,
-                            None  # Don't add to list yet, we'll do it in batch
-                        )
-                        
-                        # Consider it successful if we got an ID or email (contact exists)
-                        if contact_id:
-                            success_count += 1
-                            if i % 10 == 0 or i == len(contacts_to_add):
-                                print(f"    Processed {i}/{len(contacts_to_add)} contacts... ({success_count} successful)")
-                        else:
-                            # Even if we couldn't get ID, contact might exist - try to verify
+                for chunk in diff.iter_to_add(DIFF_CHUNK_SIZE):
+                    with profile_phase('upserts'):
+                        for email, first_name, last_name in chunk:
+                            i += 1
                             try:
-                                contact_info = contacts_api.get_contact_info(email)
-                                success_count += 1
-                                if i % 10 == 0 or i == len(contacts_to_add):
-                                    print(f"    Processed {i}/{len(contacts_to_add)} contacts... ({success_count} successful)")
-                            except:
+                                # Create/update contact in Brevo
+                                contact_id = create_or_update_brevo_contact(
+                                    contacts_api, 
+                                    email, 
+                                    (first_name or '').strip(), 
+                                    (last_name or '').strip(),
+                                    None  # Don't add to list yet, we'll do it in batch
+                                )
+                                
+                                # Consider it successful if we got an ID or email (contact exists)
+                                if contact_id:
+                                    success_count += 1
+                                else:
+                                    # Even if we couldn't get ID, contact might exist - try to verify
+                                    try:
+                                        contacts_api.get_contact_info(email)
+                                        success_count += 1
+                                    except:
+                                        error_count += 1
+                                        log_event(logging.WARNING, 'contact_upsert_failed', list=list_name, email=email)
+                                if i % 10 == 0 or i == to_add_count:
+                                    log_event(logging.DEBUG, 'contact_upsert_progress', list=list_name, processed=i, total=to_add_count, successful=success_count)
+                            except CircuitOpenError:
+                                raise
+                            except Exception as e:
+                                log_event(logging.WARNING, 'contact_upsert_error', list=list_name, email=email, error=e)
                                 error_count += 1
-                                print(f"    Failed to process {email}")
-                    except Exception as e:
-                        print(f"    Error processing {email}: {e}")
-                        error_count += 1
-                
-                print(f"\n  Successfully created/updated {success_count} contacts")
-                if error_count > 0:
-                    print(f"  Errors: {error_count} contacts")
+                    
+                    # Add this chunk of new contacts to the list in batch
+                    with profile_phase('adds'):
+                        try:
+                            add_contacts_to_brevo_list(lists_api, brevo_list_id, [row[0] for row in chunk])
+                        except CircuitOpenError:
+                            raise
+                        except Exception as e:
+                            log_event(logging.ERROR, 'brevo_add_error', list=list_name, error=e)
                 
-                # Add all new contacts to the list in batch
-                print(f"\n  Adding contacts to list...")
-                try:
-                    add_contacts_to_brevo_list(lists_api, brevo_list_id, contacts_to_add)
-                except Exception as e:
-                    print(f"    Error adding contacts to list: {e}")
-            else:
-                print(f"\n  No new contacts to add - all MonClub contacts are already in Brevo")
+                log_event(logging.INFO, 'contacts_upserted', list=list_name, successful=success_count, errors=error_count)
             
             # Step 2: Remove contacts that are not in MonClub
-            if contacts_to_remove:
-                print(f"\nRemoving {len(contacts_to_remove)} contacts from Brevo list...")
-                try:
-                    remove_contacts_from_brevo_list(lists_api, brevo_list_id, contacts_to_remove)
-                    print(f"  Successfully removed {len(contacts_to_remove)} contacts from Brevo list")
-                except Exception as e:
-                    print(f"  Error removing contacts from list: {e}")
-            else:
-                print(f"\n  No contacts to remove - all Brevo contacts are in MonClub")
-            
-            # Final summary
-            print(f"\n✓ {list_name} sync completed!")
-            print(f"  List ID: {brevo_list_id}")
-            print(f"  Contacts added: {len(contacts_to_add)}")
-            print(f"  Contacts removed: {len(contacts_to_remove)}")
-            print(f"  Contacts in sync: {comparison_result.get('in_both', 0)}")
-            print(f"  Total in Brevo list: {comparison_result.get('brevo_count', 0) - len(contacts_to_remove) + len(contacts_to_add)}")
-            
-            return True
-            
-        except Exception as e:
-            print(f"\n✗ Error syncing {list_name} to Brevo: {e}")
-            return False
+            if to_remove_count:
+                with profile_phase('removes'):
+                    for chunk in diff.iter_to_remove(DIFF_CHUNK_SIZE):
+                        try:
+                            remove_contacts_from_brevo_list(lists_api, brevo_list_id, chunk)
+                        except CircuitOpenError:
+                            raise
+                        except Exception as e:
+                            log_event(logging.ERROR, 'brevo_remove_error', list=list_name, error=e)
+        finally:
+            diff.close()
+        
+        # Remember what Brevo should hold, for the verification stage
+        blocked_count = comparison_result['blocked_count']
+        expected_count = comparison_result['monclub_count'] - blocked_count
+        list_data['brevo_list_id'] = brevo_list_id
+        list_data['fingerprint'] = fingerprint
+        list_data['expected_count'] = expected_count
+        list_data['blocked_count'] = blocked_count
+        
+        # Final summary
+        log_event(
+            logging.INFO, 'list_synced',
+            list=list_name,
+            list_id=brevo_list_id,
+            added=to_add_count,
+            removed=to_remove_count,
+            in_sync=comparison_result.get('in_both', 0),
+            blocked=blocked_count,
+            expected_total=expected_count
+        )
+
+        return True
+
+    except CircuitOpenError:
+        raise
+    except Exception as e:
+        log_event(logging.ERROR, 'list_failed', list=list_name, error=e)
+        return False
+    finally:
+        flush_logs()
+
+def sync_lists_sequentially(token, monclub_lists_data, sync_list, job_tracker=None):
+    """Fetch the members of every list, then sync the lists one by one with sync_list (a bound sync_single_list)"""
+    for list_data in monclub_lists_data:
+        load_list_members(token, list_data)
     
-    # Sync all lists
     synced_count = 0
     failed_count = 0
-    
+    skipped_count = 0
     for list_data in monclub_lists_data:
-        if sync_single_list(list_data, monclub_folder_id, brevo_lists_api, brevo_contacts_api):
+        result = sync_list(list_data)
+        if result is None:
+            skipped_count += 1
+        elif result:
             synced_count += 1
         else:
             failed_count += 1
+        # Release the members of the finished list
+        list_data.pop('members', None)
+        if job_tracker is not None:
+            job_tracker.poll_due()
+    return synced_count, failed_count, skipped_count
+
+def sync_lists_pipelined(token, monclub_lists_data, sync_list, job_tracker=None, queue_size=2):
+    """Sync each list with sync_list as soon as a producer thread has fetched its members, through a bounded queue"""
+    ready_lists = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    producer_errors = []
     
-    # Final summary
-    print(f"\n{'='*60}")
-    print(f"ALL LISTS SYNC SUMMARY")
-    print(f"{'='*60}")
-    print(f"  Total lists: {len(monclub_lists_data)}")
-    print(f"  Successfully synced: {synced_count}")
-    print(f"  Failed: {failed_count}")
-    print(f"{'='*60}")
-    
-    # Print end timestamp
-    end_time = datetime.now()
-    duration = end_time - start_time
-    print()
-    print("="*60)
-    print(f"SYNC SCRIPT COMPLETED")
-    print(f"End time: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Duration: {duration}")
-    print("="*60)
-    
-    # Send success notification email (if not configured to only send on errors)
-    email_on_error_only = os.getenv('BREVO_EMAIL_ON_ERROR_ONLY', 'false').lower() in ('true', '1', 'yes')
-    if not email_on_error_only:
-        print("\nSending sync results email...")
-        sync_summary = {
-            'total_lists': len(monclub_lists_data),
-            'synced_count': synced_count,
-            'failed_count': failed_count
-        }
-        send_sync_results_email(
-            success=True,
-            sync_summary=sync_summary,
-            start_time=start_time,
-            end_time=end_time
-        )
-    else:
-        print("\nEmail notification skipped (BREVO_EMAIL_ON_ERROR_ONLY is enabled)")
-
-except requests.exceptions.RequestException as e:
-    end_time = datetime.now()
-    duration = end_time - start_time
-    error_message = str(e)
-    print(f"\nError with MonClub API: {e}")
-    print()
-    print("="*60)
-    print(f"SYNC SCRIPT FAILED")
-    print(f"End time: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Duration: {duration}")
-    print("="*60)
-    # Send error notification email
-    print("\nSending sync results email...")
-    send_sync_results_email(
-        success=False,
-        error_type="MonClub API Error",
-        error_message=error_message,
-        start_time=start_time,
-        end_time=end_time
-    )
-except ApiException as e:
-    end_time = datetime.now()
-    duration = end_time - start_time
-    error_message = str(e)
-    print(f"\nException when calling Brevo API: {e}")
-    print()
-    print("="*60)
-    print(f"SYNC SCRIPT FAILED")
-    print(f"End time: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Duration: {duration}")
-    print("="*60)
-    # Send error notification email
-    print("\nSending sync results email...")
-    send_sync_results_email(
-        success=False,
-        error_type="Brevo API Error",
-        error_message=error_message,
-        start_time=start_time,
-        end_time=end_time
-    )
-except Exception as e:
-    end_time = datetime.now()
-    duration = end_time - start_time
-    error_message = str(e)
-    print(f"\nUnexpected error: {e}")
-    print()
-    print("="*60)
-    print(f"SYNC SCRIPT FAILED")
-    print(f"End time: {end_time.strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"Duration: {duration}")
-    print("="*60)
-    # Send error notification email
-    print("\nSending sync results email...")
-    send_sync_results_email(
-        success=False,
-        error_type="Unexpected Error",
-        error_message=error_message,
-        start_time=start_time,
-        end_time=end_time
+    def produce():
+        try:
+            for list_data in monclub_lists_data:
+                if stop.is_set():
+                    return
+                load_list_members(token, list_data)
+                while not stop.is_set():
+                    try:
+                        ready_lists.put(list_data, timeout=1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except Exception as e:
+            # Re-raised by the worker, e.g. when the MonClub circuit breaker opens
+            producer_errors.append(e)
+        finally:
+            # Tell the worker that no more lists are coming, unless it already gave up
+            if not stop.is_set():
+                ready_lists.put(None)
+    
+    producer = threading.Thread(target=produce, name='monclub-fetch', daemon=True)
+    producer.start()
+    
+    synced_count = 0
+    failed_count = 0
+    skipped_count = 0
+    try:
+        while True:
+            list_data = ready_lists.get()
+            if list_data is None:
+                break
+            result = sync_list(list_data)
+            if result is None:
+                skipped_count += 1
+            elif result:
+                synced_count += 1
+            else:
+                failed_count += 1
+            # Release the members of the finished list
+            list_data.pop('members', None)
+            if job_tracker is not None:
+                job_tracker.poll_due()
+    finally:
+        # The producer stops before its next fetch; an in-flight fetch is not
+        # waited for, the daemon thread is dropped when the run ends
+        stop.set()
+    if producer_errors:
+        raise producer_errors[0]
+    return synced_count, failed_count, skipped_count
+
+def collect_list_members(token, list_data):
+    """Fetch a list's members again, deriving a parent from its sub-lists and their errors like load_list_members"""
+    list_data.pop('members_error', None)
+    if not list_data.get('children'):
+        fetch_list_members(token, list_data)
+        return list_data.pop('members')
+    members_by_email = {}
+    for child in list_data['children']:
+        for member in collect_list_members(token, child):
+            members_by_email.setdefault(member['email'], member)
+        if child.get('members_error'):
+            list_data['members_error'] = f"sub-list {child['name']} could not be fetched"
+    return list(members_by_email.values())
+
+def verify_synced_lists(token, monclub_lists_data, sync_list, lists_api, folder_id, sync_state):
+    """Check the synced lists' Brevo counts with one catalogue call, reconcile the ones that disagree and record the verified ones"""
+    with profile_phase('brevo_catalogue'):
+        catalogue = get_brevo_folder_lists(lists_api, folder_id)
+    counts_by_id = {entry['id']: entry['unique_subscribers'] for entry in catalogue.values()}
+    
+    verified_count = 0
+    mismatched_lists = []
+    for list_data in monclub_lists_data:
+        # Lists that were skipped or failed have nothing to verify
+        if 'expected_count' not in list_data:
+            continue
+        actual_count = counts_by_id.get(list_data['brevo_list_id'])
+        if actual_count == list_data['expected_count']:
+            verified_count += 1
+            record_list_state(sync_state, list_data)
+        else:
+            log_event(
+                logging.WARNING, 'list_count_mismatch',
+                list=list_data['name'], list_id=list_data['brevo_list_id'],
+                expected=list_data['expected_count'], actual=actual_count
+            )
+            mismatched_lists.append(list_data)
+    
+    resynced_lists = []
+    for list_data in mismatched_lists:
+        sync_state['lists'].pop(list_data['_id'], None)
+        # Only a list synced again gets a new expected count; a failed fetch must not count as reconciled
+        list_data.pop('expected_count')
+        list_data['members'] = collect_list_members(token, list_data)
+        if list_data.get('members_error'):
+            log_event(logging.ERROR, 'list_reconcile_failed', list=list_data['name'], reason=list_data['members_error'])
+        # Write directly: background imports started now would never be waited for or reported
+        elif sync_list(list_data, catalogue=catalogue, job_tracker=None, force_full=True) and 'expected_count' in list_data:
+            resynced_lists.append(list_data)
+        list_data.pop('members', None)
+    
+    # A reconciled list is only recorded once Brevo shows its expected count
+    reconciled_count = 0
+    if resynced_lists:
+        with profile_phase('brevo_catalogue'):
+            catalogue = get_brevo_folder_lists(lists_api, folder_id)
+        counts_by_id = {entry['id']: entry['unique_subscribers'] for entry in catalogue.values()}
+        for list_data in resynced_lists:
+            actual_count = counts_by_id.get(list_data['brevo_list_id'])
+            if actual_count == list_data['expected_count']:
+                reconciled_count += 1
+                record_list_state(sync_state, list_data)
+            else:
+                log_event(
+                    logging.ERROR, 'list_reconcile_failed',
+                    list=list_data['name'], list_id=list_data['brevo_list_id'],
+                    expected=list_data['expected_count'], actual=actual_count
+                )
+    
+    log_event(
+        logging.INFO, 'lists_verified',
+        verified=verified_count, mismatched=len(mismatched_lists), reconciled=reconciled_count
     )
+    return {'verified': verified_count, 'mismatched': len(mismatched_lists), 'reconciled': reconciled_count}
 
+# Main execution
+def main(argv=None):
+    """Run a full MonClub to Brevo sync"""
+    global profiler
+    args = parse_args(argv)
+    if args.profile is not None:
+        profiler = PhaseProfiler(args.profile or os.path.join('profiles', datetime.now().strftime('%Y%m%d-%H%M%S')))
+    
+    start_time = datetime.now()
+    try:
+        log_event(logging.INFO, 'sync_started', start_time=start_time.strftime('%Y-%m-%d %H:%M:%S'))
+        
+        # Step 1: Authenticate to MonClub API
+        with profile_phase('auth'):
+            monclub_token = authenticate_monclub()
+        log_event(logging.INFO, 'monclub_authenticated')
+        
+        # Step 2: Get lists from MonClub API
+        with profile_phase('list_fetch'):
+            monclub_lists = get_monclub_lists(monclub_token)
+        
+        # Step 3: Extract all lists with _id and name (prefixed with "MonClub ")
+        # Only top-level lists (parentId null) unless MONCLUB_SYNC_SUBLISTS is enabled
+        include_sublists = os.getenv('MONCLUB_SYNC_SUBLISTS', 'false').lower() in ('true', '1', 'yes')
+        monclub_lists_data = build_monclub_list_tree(monclub_lists, include_sublists)
+        log_event(logging.INFO, 'monclub_lists_found', lists=len(monclub_lists_data), sublists=include_sublists)
+        
+        # Only the lists chosen on the command line are fetched and synced
+        sync_state = load_sync_state()
+        if args.list_id or args.list_name or args.min_members is not None or args.max_members is not None:
+            monclub_lists_data = select_monclub_lists(
+                monclub_lists_data, args.list_id, args.list_name, args.min_members, args.max_members, sync_state
+            )
+            log_event(logging.INFO, 'monclub_lists_selected', lists=len(monclub_lists_data))
+        for list_data in monclub_lists_data:
+            log_event(logging.DEBUG, 'monclub_list', list=list_data['name'], list_id=list_data['_id'], sublists=len(list_data['children']))
+        
+        # Step 4: Configure Brevo API
+        configuration = brevo_python.Configuration()
+        configuration.api_key['api-key'] = os.getenv('BREVO_API_KEY')
+        
+        api_client = create_brevo_api_client(configuration)
+        
+        with profile_phase('brevo_catalogue'):
+            # Step 5: Get account information from Brevo
+            api_instance = brevo_python.AccountApi(api_client)
+            api_response = api_instance.get_account()
+            log_event(logging.INFO, 'brevo_account', email=getattr(api_response, 'email', None), company=getattr(api_response, 'company_name', None))
+            log_event(logging.DEBUG, 'brevo_account_details', account=api_response.to_dict() if hasattr(api_response, 'to_dict') else api_response)
+            
+            # Step 6: Get the MonClub folder ID (once for all lists)
+            monclub_folder_id = get_brevo_folder_id(api_client, "MonClub")
+            
+            if not monclub_folder_id:
+                raise Exception("MonClub folder not found")
+            
+            # Step 7: Get the existing lists of the MonClub folder with their subscriber counts
+            from brevo_python.api.lists_api import ListsApi
+            brevo_lists_api = ListsApi(api_client)
+            brevo_catalogue = get_brevo_folder_lists(brevo_lists_api, monclub_folder_id)
+            log_event(logging.INFO, 'brevo_lists_found', lists=len(brevo_catalogue))
+        
+        from brevo_python.api.contacts_api import ContactsApi
+        brevo_contacts_api = ContactsApi(api_client)
+        
+        # In bulk mode new contacts are imported through Brevo background processes
+        job_tracker = None
+        if os.getenv('BREVO_BULK_IMPORT', 'false').lower() in ('true', '1', 'yes'):
+            from brevo_python.api.process_api import ProcessApi
+            job_tracker = ImportJobTracker(
+                ProcessApi(api_client),
+                chunk_size=int(os.getenv('BREVO_IMPORT_CHUNK_SIZE', '5000')),
+                timeout=float(os.getenv('BREVO_IMPORT_TIMEOUT', '1800'))
+            )
+        
+        # Contacts Brevo would refuse to email are never added to the lists
+        excluded_emails = frozenset()
+        if os.getenv('BREVO_SKIP_BLOCKLISTED', 'true').lower() in ('true', '1', 'yes'):
+            from brevo_python.api.transactional_emails_api import TransactionalEmailsApi
+            with profile_phase('brevo_catalogue'):
+                excluded_emails = refresh_blocklist_index(brevo_contacts_api, TransactionalEmailsApi(api_client), sync_state)
+        
+        sync_options = SyncOptions(
+            excluded_emails=excluded_emails,
+            min_members=args.min_members,
+            max_members=args.max_members,
+            changed_since=args.changed_since,
+            changed_only=args.changed_only
+        )
+        sync_list = functools.partial(
+            sync_single_list,
+            folder_id=monclub_folder_id,
+            lists_api=brevo_lists_api,
+            contacts_api=brevo_contacts_api,
+            job_tracker=job_tracker,
+            catalogue=brevo_catalogue,
+            sync_state=sync_state,
+            options=sync_options
+        )
+        
+        # Step 8: Get members for each list and sync them to Brevo
+        # In pipelined mode a list is synced as soon as its members are fetched
+        pipeline_enabled = os.getenv('SYNC_PIPELINE', 'false').lower() in ('true', '1', 'yes')
+        if pipeline_enabled:
+            queue_size = int(os.getenv('SYNC_PIPELINE_QUEUE_SIZE', '2'))
+            synced_count, failed_count, skipped_count = sync_lists_pipelined(monclub_token, monclub_lists_data, sync_list, job_tracker, queue_size)
+        else:
+            synced_count, failed_count, skipped_count = sync_lists_sequentially(monclub_token, monclub_lists_data, sync_list, job_tracker)
+        
+        # Wait for the imports still running in the background
+        import_report = None
+        if job_tracker is not None:
+            job_tracker.wait_all()
+            import_report = job_tracker.report()
+        
+        # Step 9: Check the Brevo subscriber counts and reconcile the lists that disagree
+        verification = verify_synced_lists(monclub_token, monclub_lists_data, sync_list, brevo_lists_api, monclub_folder_id, sync_state)
+        save_sync_state(sync_state)
+        blocked_count = sum(list_data.get('blocked_count', 0) for list_data in monclub_lists_data)
+        
+        # Final summary
+        log_codec_stats()
+        end_time = datetime.now()
+        duration = end_time - start_time
+        log_event(
+            logging.INFO, 'sync_completed',
+            total_lists=len(monclub_lists_data),
+            synced=synced_count,
+            failed=failed_count,
+            skipped=skipped_count,
+            verified=verification['verified'],
+            reconciled=verification['reconciled'],
+            blocked=blocked_count,
+            import_jobs=import_report['total'] if import_report else 0,
+            import_jobs_failed=len(import_report['failed']) if import_report else 0,
+            end_time=end_time.strftime('%Y-%m-%d %H:%M:%S'),
+            duration=duration
+        )
+        
+        # Send success notification email (if not configured to only send on errors)
+        email_on_error_only = os.getenv('BREVO_EMAIL_ON_ERROR_ONLY', 'false').lower() in ('true', '1', 'yes')
+        if not email_on_error_only:
+            sync_summary = {
+                'total_lists': len(monclub_lists_data),
+                'synced_count': synced_count,
+                'failed_count': failed_count,
+                'skipped_count': skipped_count,
+                'verification': verification,
+                'blocked_count': blocked_count,
+                'import_report': import_report
+            }
+            with profile_phase('notification'):
+                send_sync_results_email(
+                    success=True,
+                    sync_summary=sync_summary,
+                    start_time=start_time,
+                    end_time=end_time
+                )
+        else:
+            log_event(logging.INFO, 'notification_skipped', reason='BREVO_EMAIL_ON_ERROR_ONLY')
+    
+    except CircuitOpenError as e:
+        end_time = datetime.now()
+        duration = end_time - start_time
+        error_message = str(e)
+        error_type = f"{e.breaker.name} Circuit Breaker Open"
+        log_event(logging.ERROR, 'sync_aborted', error_type=error_type, breaker=e.breaker.name, error=e, end_time=end_time.strftime('%Y-%m-%d %H:%M:%S'), duration=duration)
+        # Send error notification email
+        with profile_phase('notification'):
+            send_sync_results_email(
+                success=False,
+                error_type=error_type,
+                error_message=error_message,
+                start_time=start_time,
+                end_time=end_time
+            )
+    except requests.exceptions.RequestException as e:
+        end_time = datetime.now()
+        duration = end_time - start_time
+        error_message = str(e)
+        log_event(logging.ERROR, 'sync_failed', error_type='MonClub API Error', error=e, end_time=end_time.strftime('%Y-%m-%d %H:%M:%S'), duration=duration)
+        # Send error notification email
+        with profile_phase('notification'):
+            send_sync_results_email(
+                success=False,
+                error_type="MonClub API Error",
+                error_message=error_message,
+                start_time=start_time,
+                end_time=end_time
+            )
+    except ApiException as e:
+        end_time = datetime.now()
+        duration = end_time - start_time
+        error_message = str(e)
+        log_event(logging.ERROR, 'sync_failed', error_type='Brevo API Error', error=e, end_time=end_time.strftime('%Y-%m-%d %H:%M:%S'), duration=duration)
+        # Send error notification email
+        with profile_phase('notification'):
+            send_sync_results_email(
+                success=False,
+                error_type="Brevo API Error",
+                error_message=error_message,
+                start_time=start_time,
+                end_time=end_time
+            )
+    except Exception as e:
+        end_time = datetime.now()
+        duration = end_time - start_time
+        error_message = str(e)
+        log_event(logging.ERROR, 'sync_failed', error_type='Unexpected Error', error=e, end_time=end_time.strftime('%Y-%m-%d %H:%M:%S'), duration=duration)
+        # Send error notification email
+        with profile_phase('notification'):
+            send_sync_results_email(
+                success=False,
+                error_type="Unexpected Error",
+                error_message=error_message,
+                start_time=start_time,
+                end_time=end_time
+            )
+    finally:
+        if profiler is not None:
+            profiler.write()
+        flush_logs()
 
+if __name__ == '__main__':
+    main()
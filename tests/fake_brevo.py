@@ -0,0 +1,76 @@
+"""Local fakes of the Brevo APIs used by the sync, driven by a fake clock"""
+import types
+
+from brevo_python.rest import ApiException
+
+
+class FakeClock:
+    """Monotonic clock whose sleep() only moves time forward"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeProcessApi:
+    """ProcessApi whose import processes finish after a delay on the fake clock.
+
+    plan maps a process id to (seconds until done, final status); a process
+    is queued, then in_process for its second half, then final. Processes
+    without a plan never finish. With error set, every call raises it.
+    """
+
+    def __init__(self, clock, plan=None, page_size=50):
+        self.clock = clock
+        self.plan = plan or {}
+        self.page_size = page_size
+        self.started = {}
+        self.error = None
+        self.calls = {'get_processes': 0, 'get_process': 0}
+
+    def start(self, process_id):
+        self.started[process_id] = self.clock()
+
+    def status(self, process_id):
+        delay, final_status = self.plan.get(process_id, (float('inf'), None))
+        elapsed = self.clock() - self.started[process_id]
+        if elapsed >= delay:
+            return final_status
+        return 'in_process' if elapsed >= delay / 2 else 'queued'
+
+    def get_processes(self, limit=10, offset=0, sort='desc'):
+        self.calls['get_processes'] += 1
+        if self.error is not None:
+            raise self.error
+        process_ids = sorted(self.started, key=self.started.get, reverse=(sort == 'desc'))
+        page = process_ids[offset:offset + min(limit, self.page_size)]
+        return types.SimpleNamespace(processes=[{'id': process_id, 'status': self.status(process_id)} for process_id in page])
+
+    def get_process(self, process_id):
+        self.calls['get_process'] += 1
+        if self.error is not None:
+            raise self.error
+        if process_id not in self.started:
+            raise ApiException(status=404, reason='Process not found')
+        return {'id': process_id, 'status': self.status(process_id)}
+
+
+class FakeContactsApi:
+    """ContactsApi that starts an import process on the FakeProcessApi for every import"""
+
+    def __init__(self, process_api):
+        self.process_api = process_api
+        self.imports = []
+        self.next_process_id = 1
+
+    def import_contacts(self, request_contact_import):
+        process_id = self.next_process_id
+        self.next_process_id += 1
+        self.imports.append(request_contact_import)
+        self.process_api.start(process_id)
+        return types.SimpleNamespace(process_id=process_id)
@@ -0,0 +1,97 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from brevo_python.rest import ApiException
+
+import script
+from fake_brevo import FakeClock, FakeContactsApi, FakeProcessApi
+
+
+class ImportJobTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.contacts = [('a@example.com', 'Ann', 'A'), ('b@example.com', 'Bob', 'B')]
+
+    def make_tracker(self, process_api, timeout=1800.0):
+        return script.ImportJobTracker(
+            process_api, poll_interval=2.0, max_poll_interval=30.0,
+            timeout=timeout, clock=self.clock, sleep=self.clock.sleep
+        )
+
+    def test_delayed_completion(self):
+        process_api = FakeProcessApi(self.clock, plan={1: (45, 'completed'), 2: (300, 'completed')})
+        contacts_api = FakeContactsApi(process_api)
+        tracker = self.make_tracker(process_api)
+        tracker.submit(contacts_api, 'MonClub A', 10, self.contacts)
+        tracker.submit(contacts_api, 'MonClub B', 11, self.contacts)
+
+        tracker.poll_due()
+        self.assertEqual(len(tracker.pending_jobs), 2)
+
+        tracker.wait_all()
+        report = tracker.report()
+        self.assertEqual(report['completed'], 2)
+        self.assertEqual(report['failed'], [])
+        self.assertGreaterEqual(report['jobs'][0]['duration'], 45)
+        self.assertGreaterEqual(report['jobs'][1]['duration'], 300)
+        # Polling backs off instead of checking every poll_interval
+        self.assertLess(process_api.calls['get_processes'], 300 / 2.0)
+
+    def test_csv_body(self):
+        process_api = FakeProcessApi(self.clock, plan={1: (0, 'completed')})
+        contacts_api = FakeContactsApi(process_api)
+        tracker = self.make_tracker(process_api)
+        tracker.submit(contacts_api, 'MonClub A', 10, self.contacts)
+        request = contacts_api.imports[0]
+        self.assertEqual(request.list_ids, [10])
+        self.assertEqual(request.file_body.splitlines(), ['EMAIL;FIRSTNAME;LASTNAME', 'a@example.com;Ann;A', 'b@example.com;Bob;B'])
+
+    def test_failed_process(self):
+        process_api = FakeProcessApi(self.clock, plan={1: (10, 'completed'), 2: (20, 'failed')})
+        contacts_api = FakeContactsApi(process_api)
+        tracker = self.make_tracker(process_api)
+        tracker.submit(contacts_api, 'MonClub A', 10, self.contacts)
+        tracker.submit(contacts_api, 'MonClub B', 11, self.contacts)
+        tracker.wait_all()
+        report = tracker.report()
+        self.assertEqual(report['completed'], 1)
+        self.assertEqual([job['list'] for job in report['failed']], ['MonClub B'])
+        self.assertEqual(report['failed'][0]['status'], 'failed')
+
+    def test_process_older_than_first_page(self):
+        process_api = FakeProcessApi(self.clock, plan={1: (10, 'completed'), 2: (10, 'completed')}, page_size=1)
+        contacts_api = FakeContactsApi(process_api)
+        tracker = self.make_tracker(process_api)
+        tracker.submit(contacts_api, 'MonClub A', 10, self.contacts)
+        tracker.submit(contacts_api, 'MonClub B', 11, self.contacts)
+        tracker.wait_all()
+        self.assertEqual(tracker.report()['completed'], 2)
+        self.assertGreater(process_api.calls['get_process'], 0)
+
+    def test_timeout(self):
+        process_api = FakeProcessApi(self.clock)
+        contacts_api = FakeContactsApi(process_api)
+        tracker = self.make_tracker(process_api, timeout=600)
+        tracker.submit(contacts_api, 'MonClub A', 10, self.contacts)
+        tracker.wait_all()
+        job = tracker.report()['failed'][0]
+        self.assertEqual(job['status'], 'timeout')
+        self.assertLess(self.clock(), 600 + 30 + 1)
+
+    def test_timeout_when_polling_keeps_failing(self):
+        process_api = FakeProcessApi(self.clock, plan={1: (10, 'completed')})
+        contacts_api = FakeContactsApi(process_api)
+        tracker = self.make_tracker(process_api, timeout=600)
+        tracker.submit(contacts_api, 'MonClub A', 10, self.contacts)
+        process_api.error = ApiException(status=403, reason='Forbidden')
+        tracker.wait_all()
+        self.assertEqual(tracker.report()['failed'][0]['status'], 'timeout')
+        self.assertLess(self.clock(), 600 + 30 + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()